@@ -1,11 +1,14 @@
 ﻿from __future__ import annotations
 
 import re
+from functools import lru_cache
 
 
 _SUFFIX_RE = re.compile(r"^\s*(\d{1,3})\s*$")  # 1..999 suffix
 
 
+# pure string -> string; the hierarchy editor calls this on every code edit
+@lru_cache(maxsize=2048)
 def expand_child_code(parent_code: str, child_code: str, delimiter: str = ".") -> str:
     p = (parent_code or "").strip()
     c = (child_code or "").strip()
@@ -1,7 +1,7 @@
 ﻿from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import cm
@@ -169,7 +169,16 @@ def _ellipsis_fit(text: str, font_name: str, font_size: float, max_width: float)
     return best or ell
 
 
-def export_label_pdf(doc: Any, out_path: str, opts: Optional[PdfExportOptions] = None) -> None:
+def export_label_pdf(
+    doc: Any,
+    out_path: str,
+    opts: Optional[PdfExportOptions] = None,
+    progress: Optional[Callable[[int], None]] = None,
+) -> None:
+    """
+    progress (optional) receives 0..100 as rows are laid out; it may be called
+    from a worker thread, so it should only emit a signal or similar.
+    """
     opts = _apply_template_defaults(opts or PdfExportOptions())
 
     opts.pagesize = _norm_pagesize(getattr(opts, "pagesize", A4))
@@ -346,7 +355,14 @@ def export_label_pdf(doc: Any, out_path: str, opts: Optional[PdfExportOptions] =
             c.line(x_left, y + 1.5, x_left + col_w, y + 1.5)
             c.restoreState()
 
+    total = len(rows)
+    last_pct = -1
     for i, (lvl, code, name) in enumerate(rows, start=1):
         draw_row(i, int(lvl or 1), _as_str(code), _as_str(name))
+        if progress is not None:
+            pct = (i * 100) // total
+            if pct != last_pct:
+                last_pct = pct
+                progress(pct)
 
     c.save()
@@ -0,0 +1,46 @@
+﻿from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Generic, Hashable, TypeVar
+
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+# "nothing here" sentinel: a get() default that can't collide with a cached value,
+# so None results can be cached too
+MISS = object()
+
+
+class BoundedLRU(Generic[K, V]):
+    """
+    Small least-recently-used map for UI memo caches.
+    - get() marks a hit as most recent
+    - put() evicts the least recent entry once maxsize is exceeded
+    """
+
+    __slots__ = ("_data", "maxsize")
+
+    def __init__(self, maxsize: int) -> None:
+        self._data: "OrderedDict[K, V]" = OrderedDict()
+        self.maxsize = maxsize
+
+    def get(self, key: K, default=None):
+        data = self._data
+        if key not in data:
+            return default
+        data.move_to_end(key)
+        return data[key]
+
+    def put(self, key: K, value: V) -> None:
+        data = self._data
+        data[key] = value
+        data.move_to_end(key)
+        if len(data) > self.maxsize:
+            data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -1,6 +1,6 @@
 ﻿from __future__ import annotations
 
-from PySide6.QtGui import QAction, QKeySequence
+from PySide6.QtGui import QAction, QCloseEvent, QKeySequence
 from PySide6.QtWidgets import (
     QMainWindow,
     QWidget,
@@ -37,6 +37,11 @@ class MainWindow(QMainWindow):
 
         self._build_menu()
 
+    def closeEvent(self, event: QCloseEvent) -> None:
+        # autosave is debounced; don't lose the last few edits on exit
+        self.editor.flush_cache()
+        super().closeEvent(event)
+
     def _build_menu(self) -> None:
         menubar = self.menuBar()
 
@@ -1,9 +1,11 @@
 ﻿from __future__ import annotations
 
+import threading
+from bisect import bisect_left, bisect_right
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from PySide6.QtCore import Qt, QStringListModel
+from PySide6.QtCore import Qt, QObject, QRunnable, QStringListModel, QThreadPool, QTimer, Signal
 from PySide6.QtGui import QFont
 from PySide6.QtWidgets import (
     QWidget,
@@ -22,22 +24,129 @@ from PySide6.QtWidgets import (
     QSizePolicy,
     QDialog,
     QCompleter,
+    QProgressDialog,
 )
 
-from reportlab.lib.pagesizes import A4, A5
-
 from src.domain.models import LabelDocument
 from src.domain.units import cm_to_pt
-from src.services.cache.cache_store import load_cache, save_cache, remember, suggest
-from src.services.rules.excel_loader import load_rules_xlsx
+from src.services.cache.cache_store import CacheDB, load_cache, save_cache, remember, suggest
 from src.services.rules.exceptions import RulesWorkbookError
 from src.services.rules.engine import lookup_mapping
 from src.services.rules.rules_types import RulesWorkbook, RulesProfile
-from src.services.export.pdf_exporter import export_label_pdf, PdfExportOptions
+from src.ui.qt.lru import MISS, BoundedLRU
 from src.ui.qt.widgets.hierarchy_editor import HierarchyEditor, LookupResult
 from src.ui.qt.widgets.pdf_template_dialog import PdfTemplateDialog
 
 
+_META_KEYS = ("title", "cabinet_section")
+_HIST_KEYS = ("title_history", "cabinet_history")
+
+_SUGGEST_CACHE_MAX = 256
+_LOOKUP_CACHE_MAX = 1024
+
+# (values sorted case-insensitively, parallel lowercased values): two flat
+# columns, so a prefix query is two bisects and one slice
+_IndexEntry = Tuple[Tuple[str, ...], Tuple[str, ...]]
+_EMPTY_INDEX: _IndexEntry = ((), ())
+
+
+def _sorted_index(vals) -> _IndexEntry:
+    # lower each value once and sort the (lower, value) pairs, then split the columns
+    pairs = sorted((v.lower(), v) for v in vals)
+    if not pairs:
+        return _EMPTY_INDEX
+    lowers, ordered = zip(*pairs)
+    return ordered, lowers
+
+
+def _keyed_index(pairs) -> _IndexEntry:
+    # like _sorted_index, but each value is matched on its own already-lowered key
+    ordered = sorted(pairs)
+    if not ordered:
+        return _EMPTY_INDEX
+    lowers, values = zip(*ordered)
+    return values, lowers
+
+
+def _prefix_matches(entry: _IndexEntry, pfx_lower: str, limit: int = 200) -> List[str]:
+    values, lowers = entry
+    lo = bisect_left(lowers, pfx_lower)
+    hi = bisect_right(lowers, pfx_lower + "\uffff", lo)
+    return list(values[lo:min(hi, lo + limit)])
+
+
+def _merge_top(*parts: List[str], n: int = 200) -> List[str]:
+    """Concatenate suggestion lists in the given order, keeping each one's own ordering; dedupe and stop after n."""
+    seen = set()
+    out: List[str] = []
+    for part in parts:
+        for s in part:
+            if s in seen:
+                continue
+            seen.add(s)
+            out.append(s)
+            if len(out) >= n:
+                return out
+    return out
+
+
+def _merge_with_history(wb: List[str], hist: List[str], pfx_lower: str) -> List[str]:
+    """
+    History comes from CacheDB.suggest(): prefix matches first, then contains matches,
+    each most recent first. Keep that: recent prefix matches, then the workbook's
+    prefix matches, then history entries that only contain the typed text.
+    """
+    if not pfx_lower:
+        return _merge_top(hist, wb)
+    plen = len(pfx_lower)
+    cut = 0
+    for s in hist:
+        if s[:plen].lower() != pfx_lower:
+            break
+        cut += 1
+    return _merge_top(hist[:cut], wb, hist[cut:])
+
+# per-level history keys in CacheDB.values
+_KEY_CODES = {i: f"level{i}_codes" for i in (1, 2, 3, 4)}
+_KEY_NAMES = {i: f"level{i}_names" for i in (1, 2, 3, 4)}
+
+
+class _TaskSignals(QObject):
+    progress = Signal(int)
+    done = Signal(object)
+    failed = Signal(object)
+
+
+class _BackgroundTask(QRunnable):
+    """
+    Runs fn() on the global thread pool; the result (or the exception) comes back
+    through queued signals, so slots always execute on the GUI thread.
+    """
+
+    def __init__(self, fn: Callable[[], Any]) -> None:
+        super().__init__()
+        self._fn = fn
+        self.signals = _TaskSignals()
+
+    def run(self) -> None:
+        try:
+            result = self._fn()
+        except Exception as e:
+            self.signals.failed.emit(e)
+            return
+        self.signals.done.emit(result)
+
+
+def _is_junk_scalar(s: str) -> bool:
+    t = (s or "").strip()
+    if t in ("[", "]", "[]", "]['", "'[", "']"):
+        return True
+    # common artifacts of stringified lists
+    if t.startswith("[") and t.endswith("]") and ("'" in t or '"' in t or "," in t):
+        return True
+    return False
+
+
 class LabelEditorView(QWidget):
     """
     Meta fields are scalar in CacheDB.values:
@@ -49,23 +158,75 @@ class LabelEditorView(QWidget):
       - cabinet_history (list[str])
     """
 
+    # preset name -> page size in points (filled lazily by _compute_pagesize_pts)
+    _PRESETS: Optional[Dict[str, Tuple[float, float]]] = None
+
     def __init__(self, parent=None) -> None:
         super().__init__(parent)
 
-        self.cache = load_cache()
+        # Real cache is read from disk once the window is up (see _finish_cache_load)
+        self.cache = CacheDB()
 
         self.rules: Optional[RulesWorkbook] = None
         self.profile: Optional[RulesProfile] = None
         self.rules_path: Optional[Path] = None
 
         self.level_labels: Dict[int, str] = {1: "Level 1", 2: "Level 2", 3: "Level 3", 4: "Level 4"}
+        # profile whose level labels were last pushed into the hierarchy editor
+        self._applied_profile_id: Optional[str] = None
+        # last rules-mode flag seen by _on_mode_changed / provider state pushed to the editor
+        self._last_mode_rules: Optional[bool] = None
+        self._providers_key: Optional[tuple] = None
+
+        # memoized accessors; dropped when the profile / size widgets change
+        self._delimiter_cached: Optional[str] = None
+        self._pagesize_cached: Optional[Tuple[float, float]] = None
 
         # remember last chosen export settings per session
         self._last_template_id: str = "classic"
         self._last_section_title: str = ""
 
+        # unsaved cache edits; flushed in the background once typing goes idle
+        self._dirty: bool = False
+        self._save_task: Optional[_BackgroundTask] = None
+        # set by the in-flight save once its file write has finished (see flush_cache)
+        self._save_written: Optional[threading.Event] = None
+        # Save button pressed while a background write was running; re-run it with feedback
+        self._manual_save_pending: bool = False
+        # True while widgets are filled from the cache, so their change signals don't write it back
+        self._restoring: bool = False
+        self._rules_task: Optional[_BackgroundTask] = None
+        self._export_task: Optional[_BackgroundTask] = None
+        self._export_progress: Optional[QProgressDialog] = None
+
+        # Rules-mode suggestion indices, built once per profile of the loaded workbook.
+        # key: (profile_id, level) -> sorted unique codes / names
+        self._code_index: Dict[Tuple[str, int], _IndexEntry] = {}
+        self._name_index: Dict[Tuple[str, int], _IndexEntry] = {}
+        # key: (profile_id, level, lowercased parent_code) -> full codes below that parent,
+        # matched on their lowercased suffix after it
+        self._suffix_index: Dict[Tuple[str, int, str], _IndexEntry] = {}
+        self._indexed_pids: set = set()
+        self._mappings: Dict[Tuple[str, int, str], Any] = {}
+
+        # Suggestion results keyed by (kind, rules_on, profile_id, level, prefix, parent_code, cache_rev);
+        # _cache_rev moves whenever history is written, so stale entries simply stop matching.
+        self._suggest_cache: BoundedLRU[tuple, List[str]] = BoundedLRU(_SUGGEST_CACHE_MAX)
+        self._cache_rev: int = 0
+
+        # (profile_id, level, code_lower) -> rules lookup result (None cached too)
+        self._lookup_cache: BoundedLRU[Tuple[str, int, str], Optional[LookupResult]] = BoundedLRU(_LOOKUP_CACHE_MAX)
+
+        # export_entries() result, reused until the hierarchy changes
+        self._hier_snapshot: Optional[List[Dict[str, Any]]] = None
+
         self._sanitize_meta_cache()
 
+        self._autosave = QTimer(self)
+        self._autosave.setSingleShot(True)
+        self._autosave.setInterval(1500)
+        self._autosave.timeout.connect(self._save_cache_async)
+
         self._build_ui()
         self._wire()
 
@@ -73,6 +234,18 @@ class LabelEditorView(QWidget):
         self._refresh_hierarchy_providers()
         self._refresh_meta_completers()
 
+        QTimer.singleShot(0, self._finish_cache_load)
+
+    def _finish_cache_load(self) -> None:
+        self.cache = load_cache()
+        self._cache_rev += 1
+        self._sanitize_meta_cache()
+        self._apply_mode_ui()
+        self._refresh_meta_completers()
+        # editors opened during construction indexed the empty cache; providers are unchanged,
+        # so _refresh_hierarchy_providers() would not reset them
+        self.hierarchy.invalidate_suggestions()
+
     # ---------------- Cache helpers ----------------
     def _values(self) -> Dict[str, Any]:
         v = getattr(self.cache, "values", None)
@@ -82,7 +255,9 @@ class LabelEditorView(QWidget):
         try:
             if isinstance(v, list):
                 for item in reversed(v):
-                    s = str(item or "").strip()
+                    if not item:
+                        continue
+                    s = (item if isinstance(item, str) else str(item)).strip()
                     if s:
                         return s
                 return default
@@ -134,41 +309,26 @@ class LabelEditorView(QWidget):
         """
         vals = self._values()
 
-        def is_junk_scalar(s: str) -> bool:
-            t = (s or "").strip()
-            if t in ("[", "]", "[]", "]['", "'[", "']"):
-                return True
-            # common artifacts of stringified lists
-            if t.startswith("[") and t.endswith("]") and ("'" in t or '"' in t or "," in t):
-                return True
-            return False
-
         # normalize meta scalars
-        for key in ("title", "cabinet_section"):
+        for key in _META_KEYS:
             v = vals.get(key, "")
             if isinstance(v, list):
                 v = self._coerce_text(v, default="")
             v = str(v or "")
-            if is_junk_scalar(v):
-                vals[key] = ""
-            else:
-                vals[key] = v
+            vals[key] = "" if _is_junk_scalar(v) else v
 
         # normalize history keys
-        for hkey in ("title_history", "cabinet_history"):
+        for hkey in _HIST_KEYS:
             hv = vals.get(hkey, None)
-            if isinstance(hv, str):
-                # don't try to parse, just drop corrupted string history
-                vals[hkey] = []
-            elif isinstance(hv, list):
-                cleaned = []
+            if isinstance(hv, list):
+                cleaned: List[str] = []
                 for item in hv:
                     s = str(item or "").strip()
-                    if not s or is_junk_scalar(s):
-                        continue
-                    cleaned.append(s)
+                    if s and not _is_junk_scalar(s):
+                        cleaned.append(s)
                 vals[hkey] = cleaned
-            elif hv is None:
+            elif isinstance(hv, str) or hv is None:
+                # don't try to parse, just drop corrupted string history
                 vals[hkey] = []
 
     # ---------------- UI ----------------
@@ -229,11 +389,13 @@ class LabelEditorView(QWidget):
         self._title_completer = QCompleter(self._title_model, self)
         self._title_completer.setCaseSensitivity(Qt.CaseInsensitive)
         self._title_completer.setFilterMode(Qt.MatchContains)
+        self._title_completer.setMaxVisibleItems(8)
         self.ed_title.setCompleter(self._title_completer)
 
         self._cab_completer = QCompleter(self._cab_model, self)
         self._cab_completer.setCaseSensitivity(Qt.CaseInsensitive)
         self._cab_completer.setFilterMode(Qt.MatchContains)
+        self._cab_completer.setMaxVisibleItems(8)
         self.ed_cab.setCompleter(self._cab_completer)
 
         info_form.addRow("Title", self.ed_title)
@@ -249,14 +411,8 @@ class LabelEditorView(QWidget):
         self.cbo_size_preset.addItems(["A4 Portrait", "A4 Landscape", "A5 Portrait", "A5 Landscape"])
 
         self.chk_custom_size = QCheckBox("Custom size (cm)")
-        self.sp_w_cm = QDoubleSpinBox()
-        self.sp_w_cm.setRange(1, 100)
-        self.sp_w_cm.setDecimals(1)
-        self.sp_w_cm.setValue(21.0)
-        self.sp_h_cm = QDoubleSpinBox()
-        self.sp_h_cm.setRange(1, 100)
-        self.sp_h_cm.setDecimals(1)
-        self.sp_h_cm.setValue(29.7)
+        self.sp_w_cm = self._mk_cm_spin(21.0)
+        self.sp_h_cm = self._mk_cm_spin(29.7)
 
         size_form.addRow("Preset", self.cbo_size_preset)
         size_form.addRow(self.chk_custom_size)
@@ -279,12 +435,25 @@ class LabelEditorView(QWidget):
 
         self._on_custom_size_toggled(self.chk_custom_size.isChecked())
 
+    def _mk_cm_spin(self, default: float) -> QDoubleSpinBox:
+        # configure silently; nothing should react to construction-time valueChanged
+        s = QDoubleSpinBox()
+        s.blockSignals(True)
+        s.setRange(1, 100)
+        s.setDecimals(1)
+        s.setValue(default)
+        s.blockSignals(False)
+        return s
+
     def _wire(self) -> None:
         self.mode.currentIndexChanged.connect(lambda _i: self._on_mode_changed())
         self.btn_load_rules.clicked.connect(self._load_rules_clicked)
         self.cbo_profile.currentIndexChanged.connect(lambda _i: self._on_profile_changed())
 
         self.chk_custom_size.toggled.connect(self._on_custom_size_toggled)
+        self.sp_w_cm.valueChanged.connect(self._invalidate_pagesize)
+        self.sp_h_cm.valueChanged.connect(self._invalidate_pagesize)
+        self.cbo_size_preset.currentIndexChanged.connect(self._invalidate_pagesize)
 
         self.btn_save_cache.clicked.connect(self._save_cache_clicked)
         self.btn_export_pdf.clicked.connect(self._export_pdf_clicked)
@@ -293,9 +462,17 @@ class LabelEditorView(QWidget):
         self.ed_title.textChanged.connect(lambda t: self._on_meta_changed("title", "title_history", t))
         self.ed_cab.textChanged.connect(lambda t: self._on_meta_changed("cabinet_section", "cabinet_history", t))
 
+        # structural edits (add/remove rows) don't go through the change callback
+        tree_model = self.hierarchy.tree.model()
+        tree_model.rowsInserted.connect(lambda *_a: self._invalidate_hier_snapshot())
+        tree_model.rowsRemoved.connect(lambda *_a: self._invalidate_hier_snapshot())
+
     def _on_meta_changed(self, key_current: str, key_history: str, text: str) -> None:
+        if self._restoring:
+            return
         txt = str(text or "")
         self._cache_write_text(key_current, txt)
+        self._mark_dirty()
         if txt.strip():
             remember(self.cache, key_history, txt.strip(), limit=200)
             self._refresh_meta_completers()
@@ -320,25 +497,34 @@ class LabelEditorView(QWidget):
         return self.mode.currentIndex() == 1 and self.rules is not None and self.profile is not None
 
     def _apply_mode_ui(self) -> None:
-        self.ed_title.setText(self._cache_read_text("title", ""))
-        self.ed_cab.setText(self._cache_read_text("cabinet_section", ""))
+        # values come from the cache; echoing them back would dirty it on every launch
+        self._restoring = True
+        try:
+            self.ed_title.setText(self._cache_read_text("title", ""))
+            self.ed_cab.setText(self._cache_read_text("cabinet_section", ""))
+        finally:
+            self._restoring = False
 
         rules_ready = (self.rules is not None and len(self.rules.profiles) > 0)
         self.cbo_profile.setEnabled(self.mode.currentIndex() == 1 and rules_ready)
         self.btn_load_rules.setEnabled(self.mode.currentIndex() == 1)
-
-        if self.profile is not None:
-            try:
-                self.level_labels = dict(self.profile.level_labels or self.level_labels)
-            except Exception:
-                pass
-
-        self.hierarchy.set_level_names(
-            self.level_labels.get(1, "Level 1"),
-            self.level_labels.get(2, "Level 2"),
-            self.level_labels.get(3, "Level 3"),
-            self.level_labels.get(4, "Level 4"),
-        )
+        if self.mode.currentIndex() != 1:
+            self._delimiter_cached = None
+
+        pid = getattr(self.profile, "profile_id", None)
+        if pid != self._applied_profile_id:
+            self._applied_profile_id = pid
+            if self.profile is not None and self.profile.level_labels:
+                # profiles are frozen; treat their labels as read-only, no copy needed
+                self.level_labels = self.profile.level_labels
+
+            labels = self.level_labels
+            self.hierarchy.set_level_names(
+                labels.get(1, "Level 1"),
+                labels.get(2, "Level 2"),
+                labels.get(3, "Level 3"),
+                labels.get(4, "Level 4"),
+            )
 
         if self.profile is not None:
             self.hierarchy.set_rules_normalization(self.profile.code_delimiter or ".", 2)
@@ -346,10 +532,21 @@ class LabelEditorView(QWidget):
             self.hierarchy.set_rules_normalization(".", 2)
 
     def _refresh_hierarchy_providers(self) -> None:
-        self.hierarchy.set_providers(self._suggest_codes, self._suggest_names, self._lookup_code)
+        # re-pushing identical providers makes the editor drop its suggestion state
+        key = (self._rules_on(), getattr(self.profile, "profile_id", None), id(self.rules))
+        if key == self._providers_key:
+            return
+        self._providers_key = key
+        # free-mode history follows CacheDB.suggest() matching, so editors may filter it locally;
+        # rules-mode workbook hits are prefix-only and must come from the provider
+        self.hierarchy.set_providers(self._suggest_codes, self._suggest_names, self._lookup_code, local_filter=not key[0])
         self.hierarchy.set_on_change(self._on_hierarchy_change)
 
     def _on_mode_changed(self) -> None:
+        rules_mode = self.mode.currentIndex() == 1
+        if rules_mode == self._last_mode_rules:
+            return
+        self._last_mode_rules = rules_mode
         self._apply_mode_ui()
         self._refresh_hierarchy_providers()
 
@@ -358,18 +555,44 @@ class LabelEditorView(QWidget):
         if not path:
             return
 
-        try:
-            wb = load_rules_xlsx(path)
-            self.rules = wb
-            self.rules_path = Path(path)
+        # openpyxl is only needed once a workbook is actually picked
+        from src.services.rules.excel_loader import load_rules_xlsx
+
+        # parse off the GUI thread; large workbooks would otherwise freeze the window
+        task = _BackgroundTask(lambda: load_rules_xlsx(path))
+        task.signals.done.connect(lambda wb: self._on_rules_loaded(path, wb))
+        task.signals.failed.connect(self._on_rules_failed)
+        self._rules_task = task
+
+        self.btn_load_rules.setEnabled(False)
+        self.status.setText(f"Loading rules: {Path(path).name}…")
+        QThreadPool.globalInstance().start(task)
+
+    def _on_rules_loaded(self, path: str, wb: RulesWorkbook) -> None:
+        self._rules_task = None
 
-            self.cbo_profile.clear()
-            for pid, prof in wb.profiles.items():
-                self.cbo_profile.addItem(prof.profile_name, userData=pid)
+        self.rules = wb
+        self.rules_path = Path(path)
+        self._invalidate_rules_index()
+        # same profile id may carry different labels in the new workbook
+        self._applied_profile_id = None
 
-            self.cbo_profile.setEnabled(True)
-            self.status.setText(f"Loaded rules: {Path(path).name}")
-        except RulesWorkbookError as e:
+        # populating the combo selects the first profile -> _on_profile_changed -> _apply_profile
+        self.cbo_profile.clear()
+        for pid, prof in wb.profiles.items():
+            self.cbo_profile.addItem(prof.profile_name, userData=pid)
+
+        self.cbo_profile.setEnabled(True)
+        self.status.setText(f"Loaded rules: {Path(path).name}")
+
+        self._apply_mode_ui()
+        self._refresh_hierarchy_providers()
+
+    def _on_rules_failed(self, e: Exception) -> None:
+        self._rules_task = None
+        self.btn_load_rules.setEnabled(self.mode.currentIndex() == 1)
+
+        if isinstance(e, RulesWorkbookError):
             QMessageBox.critical(
                 self,
                 "Rules workbook not valid",
@@ -382,14 +605,14 @@ class LabelEditorView(QWidget):
             self.status.setText("Rules load failed (invalid workbook format).")
             return
 
-        except Exception as e:
-            QMessageBox.critical(self, "Load failed", str(e))
-            self.rules = None
-            self.profile = None
-            self.rules_path = None
-            self.cbo_profile.clear()
-            self.cbo_profile.setEnabled(False)
-            self.status.setText("Load failed.")
+        QMessageBox.critical(self, "Load failed", str(e))
+        self.rules = None
+        self.profile = None
+        self.rules_path = None
+        self._invalidate_rules_index()
+        self.cbo_profile.clear()
+        self.cbo_profile.setEnabled(False)
+        self.status.setText("Load failed.")
 
         self._apply_mode_ui()
         self._refresh_hierarchy_providers()
@@ -406,96 +629,330 @@ class LabelEditorView(QWidget):
             self.profile = None
         else:
             self.profile = self.rules.get_profile(str(pid))
+        self._apply_profile()
 
         self._apply_mode_ui()
         self._refresh_hierarchy_providers()
         self.status.setText("Profile selected." if self.profile else "No profile selected.")
 
+    # ---------------- Rules indices ----------------
+    def _invalidate_rules_index(self) -> None:
+        self._code_index = {}
+        self._name_index = {}
+        self._suffix_index = {}
+        self._indexed_pids = set()
+        self._mappings = {}
+        self._suggest_cache.clear()
+        self._lookup_cache.clear()
+        self._delimiter_cached = None
+
+    def _apply_profile(self) -> None:
+        """
+        Index the active profile's mappings once, so suggestions don't
+        re-scan the whole workbook on every keystroke.
+        """
+        self._delimiter_cached = None
+        self._lookup_cache.clear()
+        if self.rules is None or self.profile is None:
+            return
+        delim = self._delimiter()
+        self._mappings = self.rules.mappings or {}
+        pid = self.profile.profile_id
+        if pid in self._indexed_pids:
+            return
+        self._suggest_cache.clear()
+
+        codes: Dict[Tuple[str, int], set] = {}
+        names: Dict[Tuple[str, int], set] = {}
+        suffixes: Dict[Tuple[str, int, str], set] = {}
+        # hot locals: this walks every mapping row of the workbook
+        codes_get = codes.setdefault
+        names_get = names.setdefault
+        suffixes_get = suffixes.setdefault
+        join = delim.join
+        for (mpid, lv, _code_lower), mr in self._mappings.items():
+            if mpid != pid:
+                continue
+            code = mr.code
+            if code:
+                codes_get((pid, lv), set()).add(code)
+                # "01.2.3" -> under "01": "2.3", under "01.2": "3"
+                parts = code.split(delim)
+                for d in range(1, len(parts)):
+                    suffixes_get((pid, lv, join(parts[:d]).lower()), set()).add(
+                        (join(parts[d:]).lower(), code)
+                    )
+            if mr.name:
+                names_get((pid, lv), set()).add(mr.name)
+
+        for key, vals in codes.items():
+            self._code_index[key] = _sorted_index(vals)
+        for key, vals in names.items():
+            self._name_index[key] = _sorted_index(vals)
+        for skey, svals in suffixes.items():
+            self._suffix_index[skey] = _keyed_index(svals)
+        self._indexed_pids.add(pid)
+
+    def _delimiter(self) -> str:
+        d = self._delimiter_cached
+        if d is None:
+            d = self._delimiter_cached = getattr(self.profile, "code_delimiter", None) or "."
+        return d
+
+    def _rules_scan_codes(self, level: int) -> _IndexEntry:
+        if self.profile is None:
+            return _EMPTY_INDEX
+        return self._code_index.get((self.profile.profile_id, level), _EMPTY_INDEX)
+
+    def _rules_scan_names(self, level: int) -> _IndexEntry:
+        if self.profile is None:
+            return _EMPTY_INDEX
+        return self._name_index.get((self.profile.profile_id, level), _EMPTY_INDEX)
+
     # ---------------- Hierarchy callbacks ----------------
+    def _invalidate_hier_snapshot(self) -> None:
+        self._hier_snapshot = None
+
+    def _cache_key_code(self, level: int) -> str:
+        return _KEY_CODES.get(level) or f"level{level}_codes"
+
+    def _cache_key_name(self, level: int) -> str:
+        return _KEY_NAMES.get(level) or f"level{level}_names"
+
     def _on_hierarchy_change(self, level: int, code: str, name: str) -> None:
-        if code.strip():
-            remember(self.cache, f"level{level}_codes", code.strip(), limit=500)
-        if name.strip():
-            remember(self.cache, f"level{level}_names", name.strip(), limit=500)
+        self._hier_snapshot = None
+        self._mark_dirty()
+        self._cache_rev += 1
+        _remember = remember
+        code = code.strip()
+        name = name.strip()
+        if code:
+            _remember(self.cache, self._cache_key_code(level), code, limit=500)
+        if name:
+            _remember(self.cache, self._cache_key_name(level), name, limit=500)
 
     def _suggest_codes(self, level: int, prefix: str, parent_code: str = "") -> List[str]:
-        prefix = (prefix or "").strip()
-        if self._rules_on() and self.rules and self.profile:
-            try:
-                out = lookup_mapping(self.rules, self.profile.profile_id, level, prefix)
-                if isinstance(out, list):
-                    return [str(x) for x in out][:200]
-            except Exception:
-                pass
-        return suggest(self.cache, f"level{level}_codes", prefix, limit=200)
+        return self._suggest_cached("codes", level, prefix, parent_code)
 
     def _suggest_names(self, level: int, prefix: str, parent_code: str = "") -> List[str]:
+        return self._suggest_cached("names", level, prefix, parent_code)
+
+    def _suggest_cached(self, kind: str, level: int, prefix: str, parent_code: str) -> List[str]:
         prefix = (prefix or "").strip()
-        if self._rules_on() and self.rules and self.profile:
-            try:
-                out = lookup_mapping(self.rules, self.profile.profile_id, level, prefix)
-                if isinstance(out, list):
-                    return [str(x) for x in out][:200]
-            except Exception:
-                pass
-        return suggest(self.cache, f"level{level}_names", prefix, limit=200)
+        rules_on = self._rules_on()
+        pid = self.profile.profile_id if rules_on else None
+        key = (kind, rules_on, pid, level, prefix.lower(), parent_code or "", self._cache_rev)
+
+        hit = self._suggest_cache.get(key)
+        if hit is not None:
+            return hit
+
+        if rules_on:
+            if kind == "codes":
+                out = self._suggest_codes_rules(level, prefix, parent_code)
+            else:
+                out = self._suggest_names_rules(level, prefix, parent_code)
+        elif kind == "codes":
+            out = self._suggest_codes_free(level, prefix)
+        else:
+            out = self._suggest_names_free(level, prefix)
+
+        self._suggest_cache.put(key, out)
+        return out
+
+    def _suggest_codes_free(self, level: int, prefix: str) -> List[str]:
+        return self._suggest_free(self._cache_key_code(level), prefix)
+
+    def _suggest_names_free(self, level: int, prefix: str) -> List[str]:
+        return self._suggest_free(self._cache_key_name(level), prefix)
+
+    def _suggest_free(self, key: str, prefix: str) -> List[str]:
+        try:
+            return suggest(self.cache, key, prefix, limit=200)
+        except Exception:
+            # hand-edited cache.json can hold non-string entries
+            return []
+
+    def _suggest_codes_rules(self, level: int, prefix: str, parent_code: str = "") -> List[str]:
+        parent_code = (parent_code or "").strip()
+        pfx = prefix.lower()
+        if level > 1 and parent_code and self.profile is not None:
+            # children of a known parent: O(1) bucket lookup, then a bisect prefix window;
+            # the bucket holds the workbook's own spelling of each full code
+            parent_l = parent_code.lower()
+            head_l = parent_l + self._delimiter().lower()
+            plen = len(head_l)
+            typed = pfx[plen:] if pfx[:plen] == head_l else pfx
+            bucket = self._suffix_index.get((self.profile.profile_id, level, parent_l), _EMPTY_INDEX)
+            wb = _prefix_matches(bucket, typed)
+        else:
+            wb = _prefix_matches(self._rules_scan_codes(level), pfx)
+        return _merge_with_history(wb, self._suggest_codes_free(level, prefix), prefix.strip().lower())
+
+    def _suggest_names_rules(self, level: int, prefix: str, parent_code: str = "") -> List[str]:
+        wb = _prefix_matches(self._rules_scan_names(level), prefix.lower())
+        return _merge_with_history(wb, self._suggest_names_free(level, prefix), prefix.strip().lower())
 
     def _lookup_code(self, level: int, code: str, parent_code: str = "") -> Optional[LookupResult]:
         code = (code or "").strip()
         if not code:
             return None
 
-        if self._rules_on() and self.rules and self.profile:
-            try:
-                mr = lookup_mapping(self.rules, self.profile.profile_id, level, code)
-                if mr is not None and hasattr(mr, "name"):
-                    return LookupResult(
-                        name=str(getattr(mr, "name", "") or ""),
-                        locked=bool(getattr(mr, "locked", False)),
-                    )
-            except Exception:
-                pass
+        if self._rules_on():
+            return self._lookup_rules(level, code)
         return None
 
+    def _lookup_rules(self, level: int, code: str) -> Optional[LookupResult]:
+        key = (self.profile.profile_id, level, code.lower())
+        hit = self._lookup_cache.get(key, MISS)
+        if hit is not MISS:
+            return hit
+
+        res: Optional[LookupResult] = None
+        try:
+            mr = lookup_mapping(self.rules, self.profile.profile_id, level, code)
+            if mr is not None and hasattr(mr, "name"):
+                res = LookupResult(
+                    name=str(getattr(mr, "name", "") or ""),
+                    locked=bool(getattr(mr, "locked", False)),
+                )
+        except Exception:
+            pass
+
+        self._lookup_cache.put(key, res)
+        return res
+
     # ---------------- Size (restored) ----------------
+    def _invalidate_pagesize(self, *_args) -> None:
+        self._pagesize_cached = None
+
     def _on_custom_size_toggled(self, on: bool) -> None:
+        self._pagesize_cached = None
         self.sp_w_cm.setEnabled(bool(on))
         self.sp_h_cm.setEnabled(bool(on))
         self.cbo_size_preset.setEnabled(not bool(on))
 
     def _current_pagesize_pts(self) -> Tuple[float, float]:
+        if self._pagesize_cached is None:
+            self._pagesize_cached = self._compute_pagesize_pts()
+        return self._pagesize_cached
+
+    def _compute_pagesize_pts(self) -> Tuple[float, float]:
         if self.chk_custom_size.isChecked():
             return (cm_to_pt(self.sp_w_cm.value()), cm_to_pt(self.sp_h_cm.value()))
 
-        preset = self.cbo_size_preset.currentText()
-        if preset == "A4 Portrait":
-            return A4
-        if preset == "A4 Landscape":
-            w, h = A4
-            return (h, w)
-        if preset == "A5 Portrait":
-            return A5
-        if preset == "A5 Landscape":
-            w, h = A5
-            return (h, w)
-        return A4
+        # reportlab is heavy; build the preset table on first use, then keep it on the class
+        presets = type(self)._PRESETS
+        if presets is None:
+            from reportlab.lib.pagesizes import A4, A5
+            presets = type(self)._PRESETS = {
+                "A4 Portrait": A4,
+                "A4 Landscape": (A4[1], A4[0]),
+                "A5 Portrait": A5,
+                "A5 Landscape": (A5[1], A5[0]),
+            }
+
+        return presets.get(self.cbo_size_preset.currentText()) or presets["A4 Portrait"]
 
     # ---------------- Cache save ----------------
+    def _mark_dirty(self) -> None:
+        self._dirty = True
+        self._autosave.start()
+
     def _save_cache_clicked(self) -> None:
+        self._save_cache_async(manual=True)
+
+    def flush_cache(self) -> None:
+        """Write pending cache edits synchronously (used on shutdown)."""
+        self._autosave.stop()
+        written = self._save_written
+        if self._save_task is not None and written is not None:
+            # let the in-flight write land first so two writers never race on the file;
+            # its done/failed signals won't be delivered any more, so write again regardless
+            written.wait()
+            self._dirty = True
+        self._flush_cache()
+
+    def _flush_cache(self) -> None:
+        if not self._dirty:
+            return
         try:
             save_cache(self.cache)
-            QMessageBox.information(self, "Saved", "Cache saved.")
+            self._dirty = False
+        except Exception:
+            pass
+
+    def _save_cache_async(self, manual: bool = False) -> None:
+        if self._save_task is not None:
+            # a write is already in flight; try again once it lands
+            self._dirty = True
+            if manual:
+                self._manual_save_pending = True
+            else:
+                self._autosave.start()
+            return
+
+        # snapshot on the GUI thread so the worker never sees lists mid-mutation
+        snapshot = CacheDB(values={
+            k: (list(v) if isinstance(v, list) else v) for k, v in self._values().items()
+        })
+        self._dirty = False
+
+        written = threading.Event()
+
+        def write() -> None:
+            try:
+                save_cache(snapshot)
+            finally:
+                written.set()
+
+        task = _BackgroundTask(write)
+        task.signals.done.connect(lambda _r: self._on_save_done(manual))
+        task.signals.failed.connect(lambda err: self._on_save_failed(err, manual))
+        self._save_task = task
+        self._save_written = written
+        if manual:
+            self.status.setText("Saving cache…")
+        QThreadPool.globalInstance().start(task)
+
+    def _on_save_done(self, manual: bool) -> None:
+        self._save_task = None
+        self._save_written = None
+        if manual:
             self.status.setText("Cache saved.")
-        except Exception as e:
-            QMessageBox.critical(self, "Save Failed", str(e))
-            self.status.setText("Save cache failed.")
+            QMessageBox.information(self, "Saved", "Cache saved.")
+        if self._run_pending_manual_save():
+            return
+        if self._dirty:
+            self._autosave.start()
+
+    def _on_save_failed(self, err: Exception, manual: bool) -> None:
+        self._save_task = None
+        self._save_written = None
+        self._dirty = True
+        if manual:
+            QMessageBox.critical(self, "Save Failed", str(err))
+        self.status.setText("Save cache failed.")
+        self._run_pending_manual_save()
+
+    def _run_pending_manual_save(self) -> bool:
+        if not self._manual_save_pending:
+            return False
+        self._manual_save_pending = False
+        self._autosave.stop()
+        self._save_cache_async(manual=True)
+        return True
 
     # ---------------- Export ----------------
     def _export_pdf_clicked(self) -> None:
+        from src.services.export.pdf_exporter import export_label_pdf, PdfExportOptions
+
         doc = LabelDocument()
         doc.title = (self.ed_title.text() or "").strip()
         doc.cabinet_section = (self.ed_cab.text() or "").strip()
-        doc.hierarchy = self.hierarchy.export_entries()
+        if self._hier_snapshot is None:
+            self._hier_snapshot = self.hierarchy.export_entries()
+        doc.hierarchy = self._hier_snapshot
 
         dlg = PdfTemplateDialog(self)
         dlg.set_sample_content(
@@ -531,14 +988,43 @@ class LabelEditorView(QWidget):
         pagesize = self._current_pagesize_pts()
         opts = PdfExportOptions(pagesize=pagesize, template_id=template_id, section_title=section_title)
 
-        try:
-            export_label_pdf(doc, out_path, opts)
-            QMessageBox.information(self, "Exported", f"Exported PDF:\n{out_path}")
-            label = section_title if section_title else "no section title"
-            self.status.setText(f"Exported ({template_id}, {label}): {Path(out_path).name}")
-        except Exception as e:
-            QMessageBox.critical(self, "Export Failed", str(e))
-            self.status.setText("Export failed.")
+        # render on the pool; `task` is bound below before the pool ever calls the lambda
+        task = _BackgroundTask(lambda: export_label_pdf(doc, out_path, opts, progress=task.signals.progress.emit))
+
+        progress = QProgressDialog("Exporting PDF…", None, 0, 100, self)
+        progress.setWindowTitle("Export PDF")
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(300)
+        progress.setValue(0)
+
+        task.signals.progress.connect(progress.setValue)
+        task.signals.done.connect(lambda _r: self._on_export_done(out_path, template_id, section_title))
+        task.signals.failed.connect(self._on_export_failed)
+        self._export_task = task
+        self._export_progress = progress
+
+        self.btn_export_pdf.setEnabled(False)
+        self.status.setText("Exporting…")
+        QThreadPool.globalInstance().start(task)
+
+    def _finish_export(self) -> None:
+        self._export_task = None
+        if self._export_progress is not None:
+            self._export_progress.close()
+            self._export_progress.deleteLater()
+            self._export_progress = None
+        self.btn_export_pdf.setEnabled(True)
+
+    def _on_export_done(self, out_path: str, template_id: str, section_title: str) -> None:
+        self._finish_export()
+        QMessageBox.information(self, "Exported", f"Exported PDF:\n{out_path}")
+        label = section_title if section_title else "no section title"
+        self.status.setText(f"Exported ({template_id}, {label}): {Path(out_path).name}")
+
+    def _on_export_failed(self, e: Exception) -> None:
+        self._finish_export()
+        QMessageBox.critical(self, "Export Failed", str(e))
+        self.status.setText("Export failed.")
 
 
 
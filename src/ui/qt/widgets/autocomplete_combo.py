@@ -1,6 +1,8 @@
 ﻿from __future__ import annotations
 
-from PySide6.QtCore import Signal
+from typing import Optional
+
+from PySide6.QtCore import QStringListModel, QTimer, Signal
 from PySide6.QtWidgets import QComboBox
 
 
@@ -16,16 +18,44 @@ class AutoCompleteCombo(QComboBox):
         self.setEditable(True)
         self.setInsertPolicy(QComboBox.NoInsert)
 
+        # one reusable model: setStringList() is a single reset instead of per-item inserts
+        self._model = QStringListModel(self)
+        self.setModel(self._model)
+
         self._locked = False
         self.lineEdit().textEdited.connect(self.textEdited.emit)
 
+        # coalesce keystroke bursts into one list rebuild
+        self._pending_items: Optional[list[str]] = None
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(60)
+        self._debounce.timeout.connect(self._flush_suggestions)
+
     def set_suggestions(self, items: list[str]) -> None:
-        cur = self.currentText()
-        self.blockSignals(True)
-        self.clear()
-        self.addItems(items)
-        self.setCurrentText(cur)
-        self.blockSignals(False)
+        self._pending_items = items
+        self._debounce.start()
+
+    def _flush_suggestions(self) -> None:
+        items = self._pending_items
+        self._pending_items = None
+        if items is None:
+            return
+        le = self.lineEdit()
+        cur = le.text()
+        pos = le.cursorPosition()
+        self._model.setStringList(items)
+        clobbered = le.text() != cur
+        # restore the typed text without echoing edit signals back into the providers
+        le.blockSignals(True)
+        try:
+            le.setText(cur)
+            le.setCursorPosition(pos)
+        finally:
+            le.blockSignals(False)
+        if clobbered:
+            # the model reset may have announced another text; settle listeners on the real one
+            self.editTextChanged.emit(cur)
 
     def set_locked(self, locked: bool) -> None:
         self._locked = bool(locked)
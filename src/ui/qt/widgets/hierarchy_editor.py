@@ -1,9 +1,14 @@
 ﻿from __future__ import annotations
 
+import inspect
+import sys
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import Any, Callable, Dict, List, Optional
+from functools import partial
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from PySide6.QtCore import Qt, QStringListModel
+from PySide6.QtCore import Qt, QStringListModel, QTimer, Slot
 from PySide6.QtWidgets import (
     QWidget,
     QVBoxLayout,
@@ -11,7 +16,7 @@ from PySide6.QtWidgets import (
     QPushButton,
     QTreeWidget,
     QTreeWidgetItem,
-    QMessageBox,
+    QLabel,
     QSizePolicy,
     QStyledItemDelegate,
     QLineEdit,
@@ -21,6 +26,7 @@ from PySide6.QtWidgets import (
 )
 
 from src.domain.normalize import expand_child_code
+from src.ui.qt.lru import MISS, BoundedLRU
 
 
 @dataclass
@@ -30,14 +36,67 @@ class LookupResult:
 
 
 # Providers now accept optional parent_code (backwards compatible at runtime).
-SuggestFn = Callable[..., List[str]]
+# Suggest providers may return any iterable (a generator is fine); only the first
+# _AC_LIMIT items are consumed.
+SuggestFn = Callable[..., Iterable[str]]
 LookupFn = Callable[..., Optional[LookupResult]]
 ChangeFn = Callable[[int, str, str], None]
 
 
+def _with_parent_code(fn: Optional[Callable[..., Any]]) -> Optional[Callable[..., Any]]:
+    """
+    Return a callable that always takes (level, text, parent_code).
+    Older two-argument providers get parent_code dropped; decided once here
+    instead of by catching TypeError on every call.
+    """
+    if fn is None:
+        return None
+    try:
+        params = list(inspect.signature(fn).parameters.values())
+    except (TypeError, ValueError):
+        return fn
+    positional = [p for p in params if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)]
+    if len(positional) >= 3 or any(p.kind == p.VAR_POSITIONAL for p in params):
+        return fn
+    return lambda level, text, parent_code="": fn(level, text)
+
+
 ROLE_LEVEL = Qt.UserRole
 ROLE_LOCKED = Qt.UserRole + 1
 ROLE_CANON_NAME = Qt.UserRole + 2
+# code of the parent item, kept in sync when the parent's code is edited
+ROLE_PARENT_CODE = Qt.UserRole + 3
+# code / name as last handled by _on_item_changed; lets no-op itemChanged emissions return early
+ROLE_LAST_CODE = Qt.UserRole + 4
+ROLE_LAST_NAME = Qt.UserRole + 5
+
+# editor autocomplete: providers return at most this many items
+_AC_LIMIT = 200
+_AC_CACHE_MAX = 256
+_AC_DEBOUNCE_MS = 120
+_EDITOR_POOL_MAX = 2
+# load_entries() switches to large mode at this many items
+_LARGE_TREE_ITEMS = 2000
+
+
+def _local_index(vals: List[str]) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """(values in provider order, parallel lowercased values)."""
+    return tuple(vals), tuple(v.lower() for v in vals)
+
+
+def _local_matches(index: Tuple[Tuple[str, ...], Tuple[str, ...]], pfx: str, contains: bool = True) -> List[str]:
+    """Prefix hits first, then (if contains) the remaining substring hits; both keep provider order."""
+    values, lowers = index
+    if not pfx:
+        return list(values)
+    starts: List[str] = []
+    rest: List[str] = []
+    for v, low in zip(values, lowers):
+        if low.startswith(pfx):
+            starts.append(v)
+        elif contains and pfx in low:
+            rest.append(v)
+    return starts + rest
 
 
 class HierarchyItemDelegate(QStyledItemDelegate):
@@ -51,6 +110,11 @@ class HierarchyItemDelegate(QStyledItemDelegate):
     def __init__(self, owner: "HierarchyEditor") -> None:
         super().__init__(owner)
         self.owner = owner
+        # closed editors kept for reuse, per column: building the line edit,
+        # completer and model dominates the cost of opening a cell
+        self._editor_pool: Dict[int, List[QLineEdit]] = {}
+        # editors currently open; their local suggestion index is dropped when providers change
+        self._open_editors: List[QLineEdit] = []
 
     def createEditor(self, parent, option, index):
         if not index.isValid():
@@ -75,6 +139,50 @@ class HierarchyItemDelegate(QStyledItemDelegate):
         if col not in (self.owner.COL_CODE, self.owner.COL_NAME):
             return None
 
+        pool = self._editor_pool.get(col)
+        if pool:
+            ed = pool.pop()
+            ed.setParent(parent)
+            ed._ac_model.setStringList([])  # type: ignore[attr-defined]
+        else:
+            ed = self._new_editor(parent)
+
+        ed._ac_item = item  # type: ignore[attr-defined]
+        ed._ac_col = col    # type: ignore[attr-defined]
+
+        comp = ed._ac_comp  # type: ignore[attr-defined]
+        if self.owner._match_contains:
+            comp.setFilterMode(Qt.MatchContains)
+            comp.setModelSorting(QCompleter.UnsortedModel)
+        else:
+            # model lists are kept sorted below, so the completer can binary-search prefixes
+            comp.setFilterMode(Qt.MatchStartsWith)
+            comp.setModelSorting(QCompleter.CaseInsensitivelySortedModel)
+
+        # local index is built on first refresh, once providers are known (see _local_index_for)
+        ed._ac_all = MISS  # type: ignore[attr-defined]
+        self._open_editors.append(ed)
+
+        try:
+            self._refresh(ed, item.text(col) or "")
+        except Exception:
+            self._refresh(ed, "")
+
+        return ed
+
+    def destroyEditor(self, editor, index) -> None:
+        if editor in self._open_editors:
+            self._open_editors.remove(editor)
+        pool = self._editor_pool.setdefault(index.column(), [])
+        if isinstance(editor, QLineEdit) and hasattr(editor, "_ac_timer") and len(pool) < _EDITOR_POOL_MAX:
+            editor._ac_timer.stop()
+            editor._ac_item = None
+            editor._ac_all = None
+            pool.append(editor)
+            return
+        super().destroyEditor(editor, index)
+
+    def _new_editor(self, parent) -> QLineEdit:
         ed = QLineEdit(parent)
         ed.setClearButtonEnabled(True)
         ed.setMinimumHeight(28)
@@ -82,53 +190,98 @@ class HierarchyItemDelegate(QStyledItemDelegate):
 
         comp = QCompleter(ed)
         comp.setCaseSensitivity(Qt.CaseInsensitive)
-        comp.setFilterMode(Qt.MatchContains)
         comp.setCompletionMode(QCompleter.PopupCompletion)
 
         model = QStringListModel(ed)
         comp.setModel(model)
         ed.setCompleter(comp)
 
+        # refresh once typing pauses instead of on every keystroke
+        timer = QTimer(ed)
+        timer.setSingleShot(True)
+        timer.setInterval(_AC_DEBOUNCE_MS)
+        timer.timeout.connect(lambda: self._refresh(ed, ed.text()))
+        ed.textEdited.connect(lambda _t: timer.start())
+
         # Strong refs (avoid GC + silent crashes)
         ed._ac_model = model  # type: ignore[attr-defined]
         ed._ac_comp = comp    # type: ignore[attr-defined]
+        ed._ac_timer = timer  # type: ignore[attr-defined]
+        return ed
 
-        def refresh(prefix: str) -> None:
-            level = self.owner._depth_of(item)
-            parent_code = ""
-            try:
-                p = item.parent()
-                if p is not None:
-                    parent_code = (p.text(self.owner.COL_CODE) or "").strip()
-            except Exception:
-                parent_code = ""
-
-            try:
-                if col == self.owner.COL_CODE and self.owner._suggest_codes is not None:
-                    try:
-                        items = self.owner._suggest_codes(level, prefix or "", parent_code)
-                    except TypeError:
-                        items = self.owner._suggest_codes(level, prefix or "")
-                elif col == self.owner.COL_NAME and self.owner._suggest_names is not None:
-                    try:
-                        items = self.owner._suggest_names(level, prefix or "", parent_code)
-                    except TypeError:
-                        items = self.owner._suggest_names(level, prefix or "")
-                else:
-                    items = []
-            except Exception:
-                items = []
-
-            model.setStringList((items or [])[:200])
-
-        ed.textEdited.connect(refresh)
-
+    def _fetch(self, col: int, level: int, prefix: str, parent_code: str) -> List[str]:
         try:
-            refresh(item.text(col) or "")
+            if col == self.owner.COL_CODE and self.owner._suggest_codes is not None:
+                items = self.owner._suggest_codes(level, prefix, parent_code)
+            elif col == self.owner.COL_NAME and self.owner._suggest_names is not None:
+                items = self.owner._suggest_names(level, prefix, parent_code)
+            else:
+                return []
+            if not items:
+                return []
+            # take the cap while iterating instead of materializing then slicing
+            return list(islice(items, _AC_LIMIT))
         except Exception:
-            refresh("")
+            return []
+
+    def reset_suggestions(self) -> None:
+        """Providers changed: drop open editors' local indexes and re-query with their current text."""
+        for ed in list(self._open_editors):
+            ed._ac_all = MISS  # type: ignore[attr-defined]
+            self._refresh(ed, ed.text())
+
+    def _local_index_for(self, col: int, level: int, parent_code: str) -> Any:
+        """
+        The provider's full list for this cell when it may be filtered locally, else None.
+        MISS means no provider is set yet, so the next refresh tries again.
+        """
+        owner = self.owner
+        if not owner._ac_local:
+            return None
+        provider = owner._suggest_codes if col == owner.COL_CODE else owner._suggest_names
+        if provider is None:
+            return MISS
+        # child codes are matched on the suffix after the parent code by the provider
+        if col == owner.COL_CODE and parent_code:
+            return None
+        everything = self._fetch(col, level, "", parent_code)
+        return _local_index(everything) if len(everything) < _AC_LIMIT else None
 
-        return ed
+    def _refresh(self, ed: QLineEdit, prefix: str) -> None:
+        item = ed._ac_item  # type: ignore[attr-defined]
+        if item is None:
+            return
+        col = ed._ac_col    # type: ignore[attr-defined]
+        model = ed._ac_model  # type: ignore[attr-defined]
+
+        owner = self.owner
+        prefix = prefix or ""
+        pfx = prefix.lower()
+        contains = owner._match_contains
+        level = owner._depth_of(item)
+        parent_code = owner._parent_code_of(item)
+
+        local = ed._ac_all  # type: ignore[attr-defined]
+        if local is MISS:
+            local = ed._ac_all = self._local_index_for(col, level, parent_code)  # type: ignore[attr-defined]
+
+        if local is not None and local is not MISS:
+            items = _local_matches(local, pfx, contains)
+        else:
+            bucket = (level, parent_code, col)
+            cache = owner._ac_cache.get(bucket)
+            if cache is None:
+                cache = owner._ac_cache[bucket] = BoundedLRU(_AC_CACHE_MAX)
+            items = cache.get(pfx)
+            if items is None:
+                # no narrowing of a shorter prefix's list here: the provider's matching and
+                # ordering (prefix-only workbook hits, recency-ordered history) are its own
+                items = self._fetch(col, level, prefix, parent_code)
+                cache.put(pfx, items)
+
+        if not contains:
+            items = sorted(items, key=str.lower)
+        model.setStringList(items)
 
     def updateEditorGeometry(self, editor, option: QStyleOptionViewItem, index) -> None:
         if editor is not None:
@@ -173,16 +326,26 @@ class HierarchyEditor(QWidget):
         self._lookup: Optional[LookupFn] = None
         self._on_change: Optional[ChangeFn] = None
 
+        # delegate autocomplete results: (level, parent_code, col) -> prefix_lower -> items
+        self._ac_cache: Dict[Tuple[int, str, int], BoundedLRU[str, List[str]]] = {}
+        # providers may be filtered locally from their empty-prefix list (see set_providers)
+        self._ac_local: bool = False
+        # completer filter: substring (default) or sorted prefix search, see set_match_contains()
+        self._match_contains: bool = True
+
         # Rules normalization (set by LabelEditorView in Rules Mode)
         self._code_delimiter: str = "."
         self._pad_level1: int = 2
+        # expand_child_code with the current delimiter bound; rebuilt by set_rules_normalization
+        self._expand: Callable[[str, str], str] = partial(expand_child_code, delimiter=self._code_delimiter)
 
         self._building = False
 
         self._build_ui()
         self._wire()
 
-        self.tree.setItemDelegate(HierarchyItemDelegate(self))
+        self._delegate = HierarchyItemDelegate(self)
+        self.tree.setItemDelegate(self._delegate)
 
         self.add_level1()
 
@@ -191,10 +354,42 @@ class HierarchyEditor(QWidget):
         self._level_names = [level1, level2, level3, level4]
         self._update_buttons()
 
-    def set_providers(self, suggest_codes: Optional[SuggestFn], suggest_names: Optional[SuggestFn], lookup: Optional[LookupFn]) -> None:
-        self._suggest_codes = suggest_codes
-        self._suggest_names = suggest_names
-        self._lookup = lookup
+    def set_providers(
+        self,
+        suggest_codes: Optional[SuggestFn],
+        suggest_names: Optional[SuggestFn],
+        lookup: Optional[LookupFn],
+        local_filter: bool = False,
+    ) -> None:
+        """
+        local_filter: the suggest providers answer any prefix with the prefix matches, then the
+        substring matches, of their empty-prefix list in that list's order (as CacheDB.suggest
+        does). Open editors may then filter that list themselves instead of calling per keystroke.
+        """
+        self._suggest_codes = _with_parent_code(suggest_codes)
+        self._suggest_names = _with_parent_code(suggest_names)
+        self._lookup = _with_parent_code(lookup)
+        self._ac_local = bool(local_filter)
+        self._ac_cache.clear()
+        self._delegate.reset_suggestions()
+
+    def invalidate_suggestions(self) -> None:
+        """Forget cached suggestions and re-query open editors; call after the suggest data changes."""
+        self._ac_cache.clear()
+        self._delegate.reset_suggestions()
+
+    def set_large_mode(self, on: bool) -> None:
+        """Cheaper painting for big catalogs: no alternating row colors, no expand animation."""
+        self.tree.setAlternatingRowColors(not on)
+        self.tree.setAnimated(not on)
+
+    def set_match_contains(self, on: bool) -> None:
+        """
+        Substring completion (default) vs. prefix-only completion.
+        Prefix mode lets the completer binary-search a sorted list, but a bare child
+        suffix ("2") no longer pops up its full code ("01.2").
+        """
+        self._match_contains = bool(on)
 
     def set_on_change(self, cb: Optional[ChangeFn]) -> None:
         self._on_change = cb
@@ -204,6 +399,7 @@ class HierarchyEditor(QWidget):
         if len(d) != 1:
             d = "."
         self._code_delimiter = d
+        self._expand = partial(expand_child_code, delimiter=d)
         try:
             p = int(pad_level1)
         except Exception:
@@ -211,29 +407,66 @@ class HierarchyEditor(QWidget):
         self._pad_level1 = max(1, min(p, 6))
 
     def clear(self) -> None:
-        self._building = True
-        self.tree.clear()
-        self._building = False
-        self.add_level1()
+        with self._batch():
+            self.tree.clear()
+            self.add_level1()
+        self._update_buttons()
+
+    def load_entries(self, entries: List[Dict[str, Any]]) -> None:
+        """Replace the tree with nodes shaped like export_entries() output."""
+        count = 0
+
+        def build(node: Dict[str, Any], level: int, parent_code: str) -> QTreeWidgetItem:
+            nonlocal count
+            count += 1
+            code = str(node.get("code", "") or "").strip()
+            it = self._make_item(level=level, parent_code=parent_code)
+            name = str(node.get("name", "") or "").strip()
+            it.setText(self.COL_CODE, code)
+            it.setText(self.COL_NAME, name)
+            it.setData(0, ROLE_LAST_CODE, code)
+            it.setData(0, ROLE_LAST_NAME, name)
+            if level < 4:
+                it.addChildren([build(c, level + 1, code) for c in (node.get("children") or [])])
+            return it
+
+        with self._batch():
+            self.tree.clear()
+            roots = [build(n, 1, "") for n in (entries or [])]
+            self.set_large_mode(count >= _LARGE_TREE_ITEMS)
+            if roots:
+                self.tree.addTopLevelItems(roots)
+                self.tree.expandAll()
+                self.tree.setCurrentItem(roots[0])
+            else:
+                self.add_level1()
+        self._update_buttons()
 
     def export_entries(self) -> List[Dict[str, Any]]:
-        def walk(item: QTreeWidgetItem, level: int) -> Dict[str, Any]:
-            node = {
+        col_code = self.COL_CODE
+        col_name = self.COL_NAME
+        tree = self.tree
+
+        roots: List[Dict[str, Any]] = []
+        # iterative DFS; children are pushed in reverse so siblings come out in tree order
+        stack = [(tree.topLevelItem(i), roots, 1) for i in range(tree.topLevelItemCount() - 1, -1, -1)]
+        pop = stack.pop
+        push = stack.append
+        while stack:
+            item, out, level = pop()
+            children: List[Dict[str, Any]] = []
+            out.append({
                 "level": level,
-                "code": (item.text(self.COL_CODE) or "").strip(),
-                "name": (item.text(self.COL_NAME) or "").strip(),
-                "children": [],
-            }
-            for i in range(item.childCount()):
-                node["children"].append(walk(item.child(i), level + 1))
-            return node
-
-        roots = []
-        for i in range(self.tree.topLevelItemCount()):
-            roots.append(walk(self.tree.topLevelItem(i), 1))
+                "code": (item.text(col_code) or "").strip(),
+                "name": (item.text(col_name) or "").strip(),
+                "children": children,
+            })
+            for i in range(item.childCount() - 1, -1, -1):
+                push((item.child(i), children, level + 1))
         return roots
 
     # ---------------- Buttons ----------------
+    @Slot()
     def add_level1(self) -> None:
         it = self._make_item(level=1)
         self.tree.addTopLevelItem(it)
@@ -241,6 +474,7 @@ class HierarchyEditor(QWidget):
         self.tree.editItem(it, self.COL_CODE)
         self._update_buttons()
 
+    @Slot()
     def add_child(self) -> None:
         sel = self._selected_item()
         if sel is None:
@@ -250,13 +484,14 @@ class HierarchyEditor(QWidget):
         if level >= 4:
             self._warn("Max depth", "You cannot add deeper than Level 4.")
             return
-        child = self._make_item(level=level + 1)
+        child = self._make_item(level=level + 1, parent_code=(sel.text(self.COL_CODE) or "").strip())
         sel.addChild(child)
         sel.setExpanded(True)
         self.tree.setCurrentItem(child)
         self.tree.editItem(child, self.COL_CODE)
         self._update_buttons()
 
+    @Slot()
     def add_sibling(self) -> None:
         sel = self._selected_item()
         if sel is None:
@@ -264,7 +499,7 @@ class HierarchyEditor(QWidget):
             return
         parent = sel.parent()
         level = self._depth_of(sel)
-        sib = self._make_item(level=level)
+        sib = self._make_item(level=level, parent_code=self._parent_code_of(sel))
         if parent is None:
             self.tree.addTopLevelItem(sib)
         else:
@@ -274,6 +509,7 @@ class HierarchyEditor(QWidget):
         self.tree.editItem(sib, self.COL_CODE)
         self._update_buttons()
 
+    @Slot()
     def remove_selected(self) -> None:
         sel = self._selected_item()
         if sel is None:
@@ -292,6 +528,29 @@ class HierarchyEditor(QWidget):
         self._update_buttons()
 
     # ---------------- Internals ----------------
+    @contextmanager
+    def _silent(self) -> Iterator[None]:
+        """Write to items without re-entering _on_item_changed."""
+        was_blocked = self.tree.blockSignals(True)
+        try:
+            yield
+        finally:
+            self.tree.blockSignals(was_blocked)
+
+    @contextmanager
+    def _batch(self) -> Iterator[None]:
+        """Bulk tree mutation: no repaints or item signals until the end."""
+        self.tree.setUpdatesEnabled(False)
+        self.tree.blockSignals(True)
+        self._building = True
+        try:
+            yield
+        finally:
+            self._building = False
+            self.tree.blockSignals(False)
+            self.tree.setUpdatesEnabled(True)
+            self.tree.viewport().update()
+
     def _build_ui(self) -> None:
         lay = QVBoxLayout(self)
         lay.setContentsMargins(0, 0, 0, 0)
@@ -310,6 +569,17 @@ class HierarchyEditor(QWidget):
 
         bar.addWidget(self.btn_add_child, 0)
         bar.addWidget(self.btn_add_sibling, 0)
+
+        # non-modal notice line (see _warn); hidden until there is something to say
+        self.lbl_notice = QLabel("")
+        self.lbl_notice.setStyleSheet("color: #a15c00;")
+        self.lbl_notice.hide()
+        self._notice_timer = QTimer(self)
+        self._notice_timer.setSingleShot(True)
+        self._notice_timer.setInterval(2000)
+        self._notice_timer.timeout.connect(self.lbl_notice.hide)
+        bar.addWidget(self.lbl_notice, 0)
+
         bar.addStretch(1)
         bar.addWidget(self.btn_remove, 0)
 
@@ -344,7 +614,7 @@ class HierarchyEditor(QWidget):
         self.btn_add_sibling.clicked.connect(self.add_sibling)
         self.btn_remove.clicked.connect(self.remove_selected)
 
-        self.tree.currentItemChanged.connect(lambda _a, _b: self._update_buttons())
+        self.tree.currentItemChanged.connect(self._on_current_item_changed)
         self.tree.itemChanged.connect(self._on_item_changed)
 
     def _level_name(self, level: int) -> str:
@@ -352,6 +622,10 @@ class HierarchyEditor(QWidget):
             return self._level_names[level - 1]
         return f"Level {level}"
 
+    @Slot(QTreeWidgetItem, QTreeWidgetItem)
+    def _on_current_item_changed(self, _current: QTreeWidgetItem, _previous: QTreeWidgetItem) -> None:
+        self._update_buttons()
+
     def _update_buttons(self) -> None:
         sel = self._selected_item()
         if sel is None:
@@ -370,11 +644,14 @@ class HierarchyEditor(QWidget):
         self.btn_add_child.setEnabled(depth < 4)
         self.btn_add_sibling.setEnabled(True)
 
-    def _make_item(self, level: int) -> QTreeWidgetItem:
+    def _make_item(self, level: int, parent_code: str = "") -> QTreeWidgetItem:
         it = QTreeWidgetItem(["", ""])
         it.setData(0, ROLE_LEVEL, level)
         it.setData(0, ROLE_LOCKED, False)
         it.setData(0, ROLE_CANON_NAME, "")
+        it.setData(0, ROLE_PARENT_CODE, parent_code)
+        it.setData(0, ROLE_LAST_CODE, "")
+        it.setData(0, ROLE_LAST_NAME, "")
         it.setFlags(it.flags() | Qt.ItemIsEditable | Qt.ItemIsSelectable | Qt.ItemIsEnabled)
         return it
 
@@ -382,6 +659,10 @@ class HierarchyEditor(QWidget):
         return self.tree.currentItem()
 
     def _depth_of(self, item: QTreeWidgetItem) -> int:
+        # items never move between levels, so the level stored at creation is the depth
+        level = item.data(0, ROLE_LEVEL)
+        if level:
+            return int(level)
         d = 1
         p = item.parent()
         while p is not None:
@@ -389,8 +670,20 @@ class HierarchyEditor(QWidget):
             p = p.parent()
         return d
 
+    def _parent_code_of(self, item: QTreeWidgetItem) -> str:
+        # item data comes back as a fresh str on every read (QVariant round-trip); interning
+        # makes the many equal parent codes share one object for the cache keys built from them
+        code = item.data(0, ROLE_PARENT_CODE)
+        if code is None:
+            p = item.parent()
+            code = (p.text(self.COL_CODE) or "").strip() if p is not None else ""
+        return sys.intern(str(code))
+
     def _warn(self, title: str, msg: str) -> None:
-        QMessageBox.information(self, title, msg)
+        # shown inline for 2 s rather than in a modal box, so rapid clicking is never blocked
+        self.lbl_notice.setText(f"{title}: {msg}")
+        self.lbl_notice.show()
+        self._notice_timer.start()
 
     def _set_locked(self, item: QTreeWidgetItem, locked: bool, canonical_name: str = "") -> None:
         item.setData(0, ROLE_LOCKED, bool(locked))
@@ -405,83 +698,101 @@ class HierarchyEditor(QWidget):
 
         if level == 1:
             if code.isdigit():
+                # plain ASCII digits without a leading zero are already canonical: pad only
+                if code[0] != "0" and code.isascii():
+                    return code.zfill(self._pad_level1)
                 return str(int(code)).zfill(self._pad_level1)
             return code
 
         # Level 2+ : expand suffix using parent
-        parent = item.parent()
-        parent_code = ""
-        if parent is not None:
-            parent_code = (parent.text(self.COL_CODE) or "").strip()
+        return self._expand(self._parent_code_of(item), code)
 
-        return expand_child_code(parent_code, code, self._code_delimiter)
+    def _apply_code_edit(self, item: QTreeWidgetItem, typed: str, code: str,
+                         res: Optional[LookupResult], name: str) -> None:
+        """Write a committed code edit and its lookup result under one signal block."""
+        with self._silent():
+            if code != typed:
+                item.setText(self.COL_CODE, code)
 
+            # children read their parent code from item data; update just the direct children
+            child = item.child
+            for i in range(item.childCount()):
+                child(i).setData(0, ROLE_PARENT_CODE, code)
+
+            if not code:
+                self._set_locked(item, False, "")
+            elif res is not None and res.name:
+                item.setText(self.COL_NAME, res.name)
+                self._set_locked(item, bool(res.locked), res.name if res.locked else "")
+
+            item.setData(0, ROLE_LAST_CODE, code)
+            item.setData(0, ROLE_LAST_NAME, name)
+
+    @Slot(QTreeWidgetItem, int)
     def _on_item_changed(self, item: QTreeWidgetItem, col: int) -> None:
         if self._building:
             return
 
-        level = self._depth_of(item)
-        code = (item.text(self.COL_CODE) or "").strip()
-        name = (item.text(self.COL_NAME) or "").strip()
+        COL_CODE = self.COL_CODE
+        COL_NAME = self.COL_NAME
+        text = item.text
+        set_text = item.setText
+        data = item.data
+        on_change = self._on_change
+
+        code = (text(COL_CODE) or "").strip()
+        name = (text(COL_NAME) or "").strip()
+
+        # role-only changes and rewrites of the same text: nothing to normalize or look up
+        if col == COL_CODE:
+            if code == data(0, ROLE_LAST_CODE):
+                return
+        elif col == COL_NAME and name == data(0, ROLE_LAST_NAME):
+            return
 
-        locked = bool(item.data(0, ROLE_LOCKED) or False)
+        level = self._depth_of(item)
+        locked = bool(data(0, ROLE_LOCKED) or False)
 
         # If locked and user tried to change Name, revert immediately
-        if col == self.COL_NAME and locked:
-            canon = str(item.data(0, ROLE_CANON_NAME) or "")
-            if canon and name != canon:
-                self._building = True
-                item.setText(self.COL_NAME, canon)
-                self._building = False
-
-            if self._on_change is not None:
+        if col == COL_NAME and locked:
+            canon = str(data(0, ROLE_CANON_NAME) or "")
+            with self._silent():
+                if canon and name != canon:
+                    set_text(COL_NAME, canon)
+                item.setData(0, ROLE_LAST_NAME, canon or name)
+
+            if on_change is not None:
+                self._ac_cache.clear()
                 try:
-                    self._on_change(level, code, canon or name)
+                    on_change(level, code, canon or name)
                 except Exception:
                     pass
             return
 
-        # Code edits: normalize + lookup
-        if col == self.COL_CODE:
+        # Code edits: normalize + lookup first, then write everything back in one silent pass
+        if col == COL_CODE:
             norm = self._normalize_code_for_item(item, code)
-            if norm != code:
-                self._building = True
-                item.setText(self.COL_CODE, norm)
-                self._building = False
-                code = norm
-
-            if not code:
-                self._building = True
-                self._set_locked(item, False, "")
-                self._building = False
-            elif self._lookup is not None:
+            res: Optional[LookupResult] = None
+            if norm and self._lookup is not None:
                 # pass parent_code to lookup when possible
-                parent_code = ""
-                try:
-                    p = item.parent()
-                    if p is not None:
-                        parent_code = (p.text(self.COL_CODE) or "").strip()
-                except Exception:
-                    parent_code = ""
-
                 try:
-                    try:
-                        res = self._lookup(level, code, parent_code)
-                    except TypeError:
-                        res = self._lookup(level, code)
+                    res = self._lookup(level, norm, self._parent_code_of(item))
                 except Exception:
                     res = None
-
-                if res is not None and res.name:
-                    self._building = True
-                    item.setText(self.COL_NAME, res.name)
-                    self._set_locked(item, bool(res.locked), res.name if res.locked else "")
-                    self._building = False
+            if res is not None and res.name:
+                name = res.name.strip()
+            self._apply_code_edit(item, code, norm, res, name)
+            code = norm
+        else:
+            with self._silent():
+                item.setData(0, ROLE_LAST_NAME, name)
 
         # Remember callback
-        if self._on_change is not None:
+        if on_change is not None:
+            # the provider's history just changed under the cached suggestions
+            self._ac_cache.clear()
             try:
-                self._on_change(level, code, (item.text(self.COL_NAME) or "").strip())
+                on_change(level, code, name)
             except Exception:
                 pass
 
@@ -1,5 +1,6 @@
 ﻿from __future__ import annotations
 
+from PySide6.QtCore import Slot
 from PySide6.QtWidgets import QWidget, QHBoxLayout, QLabel, QPushButton
 from src.ui.qt.widgets.autocomplete_combo import AutoCompleteCombo
 
@@ -23,8 +24,22 @@ class LevelRowWidget(QWidget):
         lay.addWidget(self.cbo_name, 2)
         lay.addWidget(self.btn_remove, 0)
 
+        # stripped values, kept current by editTextChanged so get_values() is a plain read
+        self._code = ""
+        self._name = ""
+        self.cbo_code.editTextChanged.connect(self._on_code_text)
+        self.cbo_name.editTextChanged.connect(self._on_name_text)
+
+    @Slot(str)
+    def _on_code_text(self, s: str) -> None:
+        self._code = s.strip()
+
+    @Slot(str)
+    def _on_name_text(self, s: str) -> None:
+        self._name = s.strip()
+
     def get_values(self) -> tuple[str, str]:
-        return self.cbo_code.currentText().strip(), self.cbo_name.currentText().strip()
+        return self._code, self._name
 
     def set_values(self, code: str, name: str) -> None:
         self.cbo_code.setCurrentText(code or "")
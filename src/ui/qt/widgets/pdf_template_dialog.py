@@ -3,9 +3,10 @@
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Tuple
 
-from PySide6.QtCore import Qt, QSize, QRect
-from PySide6.QtGui import QPainter, QPixmap, QPen, QFont, QFontMetrics
+from PySide6.QtCore import Qt, QSize, QRect, QLine, QTimer
+from PySide6.QtGui import QPainter, QPixmap, QImage, QPen, QFont, QFontMetrics, QFontMetricsF, QShowEvent, QStaticText
 from PySide6.QtWidgets import (
+    QAbstractButton,
     QDialog,
     QVBoxLayout,
     QHBoxLayout,
@@ -27,6 +28,34 @@ from src.services.export.pdf.template_specs import (
     INDENT_STEP_PT,
     BULLET_GAP_PT,
 )
+from src.ui.qt.lru import BoundedLRU
+
+
+# (font key, text, max width) -> wrapped lines; cleared wholesale when full
+_WRAP_CACHE_MAX = 2048
+# (font key, text) -> laid-out QStaticText for row text; cleared wholesale when full
+_STATIC_TEXT_CACHE_MAX = 4096
+_PREVIEW_CACHE_MAX = 16
+_HEADER_CACHE_MAX = 32
+# quiet period before keystrokes / combo scrolling re-render the preview
+_PREVIEW_DEBOUNCE_MS = 150
+
+# paper sheet inside the 600x740 logical preview canvas
+_PAPER_X, _PAPER_Y = 80, 45
+_PAPER_W, _PAPER_H = 440, 650
+
+# sample hierarchy shown until a real document is handed to the dialog
+_DEMO_ROWS: Tuple[Tuple[int, str, str], ...] = (
+    (1, "01", "Mammals"),
+    (2, "01.1", "Mammals – Carnivora"),
+    (3, "01.1.1", "Katsoulia"),
+    (1, "02", "Birds"),
+    (2, "02.1", "Birds – Passerines"),
+    (3, "02.1.1", "Ornithes"),
+    (1, "03", "Reptiles"),
+    (2, "03.1", "Reptiles – Lizards"),
+    (3, "03.1.1", "Liakonia"),
+)
 
 
 @dataclass(frozen=True)
@@ -35,6 +64,56 @@ class TemplateChoice:
     template_name: str
 
 
+@dataclass(frozen=True, slots=True)
+class _TemplateRenderConsts:
+    """Preview layout values derived from a template spec (pure function of the template id)."""
+    outline: bool              # indented rows with bullets
+    two_cols_always: bool
+    two_cols_when_long: bool
+    code_col_ratio: float
+    code_name_gap: int
+    max_name_lines: int
+    row_rules: bool
+    row_rule_every: int
+    header_rule_width: int
+    header_gap: int
+
+
+# normalized template id -> render constants, filled on first preview of each template
+_TEMPLATE_CONSTS: Dict[str, _TemplateRenderConsts] = {}
+
+
+def _template_consts(tid: str, spec: Dict[str, Any]) -> _TemplateRenderConsts:
+    c = _TEMPLATE_CONSTS.get(tid)
+    if c is None:
+        outline = tid in ("outline", "two_column")
+        c = _TEMPLATE_CONSTS[tid] = _TemplateRenderConsts(
+            outline=outline,
+            two_cols_always=(tid == "two_column"),
+            two_cols_when_long=tid in ("outline", "modern", "compact"),
+            code_col_ratio=0.26 if outline else (0.40 if tid == "code_first" else 0.30),
+            code_name_gap=int(round(float(spec.get("code_name_gap_pt", 10.0)))),
+            max_name_lines=int(spec.get("max_name_lines", 3) or 3),
+            row_rules=bool(spec.get("row_rules", False)),
+            row_rule_every=max(1, int(spec.get("row_rule_every", 1))),
+            header_rule_width=max(1, int(round(float(spec.get("header_rule_width", 1.0))))),
+            header_gap=int(round(float(spec.get("header_gap_pt", 12.0)))),
+        )
+    return c
+
+
+# (family, point size, bold) -> QFont, shared by every template and dialog instance
+_QFONTS: Dict[Tuple[str, int, bool], QFont] = {}
+
+
+def _qfont(fam: str, size: int, bold: bool = False) -> QFont:
+    key = (fam, size, bold)
+    f = _QFONTS.get(key)
+    if f is None:
+        f = _QFONTS[key] = QFont(fam, size, QFont.Bold if bold else QFont.Normal)
+    return f
+
+
 TEMPLATES = [
     TemplateChoice("classic", "Classic Formal (Serif)"),
     TemplateChoice("modern", "Modern Formal (Sans)"),
@@ -73,21 +152,48 @@ class PdfTemplateDialog(QDialog):
         self._title = "NHMC Label"
         self._cabinet = "Cabinet Section: Example Cabinet A"
         self._preview_doc: Optional[LabelDocument] = None
+        # section preset currently selected in cbo_section (kept by _on_section_changed)
+        self._current_section_key: str = ""
+        self._current_is_custom: bool = False
+        self._wrap_cache: Dict[Tuple[str, str, int], Tuple[str, ...]] = {}
+        self._static_text_cache: Dict[Tuple[str, str], QStaticText] = {}
+        # QFont.key() -> {char: advance}; fonts are value types, so the key outlives repaints
+        self._char_w_cache: Dict[str, Dict[str, float]] = {}
+        # selected template id (as set by callers) -> (normalized id, merged spec)
+        self._spec_cache: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        # template id -> fonts / metrics built from its spec (see _template_fonts)
+        self._font_cache: Dict[str, Dict[str, Any]] = {}
+        # (template id, device width, device height) -> static preview background
+        self._paper_bg_cache: Dict[Tuple[str, int, int], QImage] = {}
+        # (template id, title, cabinet, device width, device height) -> background + title block
+        self._header_cache: BoundedLRU[tuple, QImage] = BoundedLRU(_HEADER_CACHE_MAX)
+        # _doc_rows() result and its hash; dropped when the preview document changes
+        self._rows: Optional[List[Tuple[int, str, str]]] = None
+        self._rows_hash: int = 0
+        # rendered previews keyed by everything that affects the picture
+        self._preview_cache: BoundedLRU[tuple, QPixmap] = BoundedLRU(_PREVIEW_CACHE_MAX)
+        # key of the pixmap currently on screen; same key again means nothing to do
+        self._last_render_key: Optional[tuple] = None
+        # nothing is painted until the dialog is first shown; callers configure it beforehand
+        self._preview_primed = False
 
         self._build_ui()
         self._wire()
-        self._update_preview()
 
     # ---------- public API ----------
     def set_sample_content(self, title: str, cabinet: str) -> None:
-        if (title or "").strip():
-            self._title = title.strip()
-        if (cabinet or "").strip():
-            self._cabinet = cabinet.strip()
+        t = (title or "").strip()
+        c = (cabinet or "").strip()
+        if t:
+            self._title = t
+        if c:
+            self._cabinet = c
         self._update_preview()
 
     def set_preview_document(self, doc: LabelDocument) -> None:
         self._preview_doc = doc
+        self._rows = None
+        self._last_render_key = None
         t = (getattr(doc, "title", "") or "").strip()
         c = (getattr(doc, "cabinet_section", "") or "").strip()
         if t:
@@ -100,35 +206,35 @@ class PdfTemplateDialog(QDialog):
         return self._selected_template_id
 
     def selected_section_title(self) -> str:
-        if self.cbo_section.currentData() == "__custom__":
+        if self._current_is_custom:
             return (self.ed_custom.text() or "").strip()
-        val = self.cbo_section.currentData()
-        return (val or "").strip()
+        # preset keys are fixed SECTION_PRESETS values, already trimmed
+        return self._current_section_key
 
     def set_selected_section_title(self, title: str) -> None:
         t = (title or "").strip()
 
-        for i in range(self.cbo_section.count()):
-            if (self.cbo_section.itemData(i) or "") == t:
-                self.cbo_section.setCurrentIndex(i)
-                self.ed_custom.setText("")
-                self._on_section_changed()
-                return
-
-        if t == "":
-            for i in range(self.cbo_section.count()):
-                if (self.cbo_section.itemData(i) or "") == "":
-                    self.cbo_section.setCurrentIndex(i)
-                    self.ed_custom.setText("")
-                    self._on_section_changed()
-                    return
-
-        for i in range(self.cbo_section.count()):
-            if (self.cbo_section.itemData(i) or "") == "__custom__":
-                self.cbo_section.setCurrentIndex(i)
+        idx = self._preset_index.get(t)
+        # both setters would schedule their own refresh; apply them silently and refresh once below
+        cbo_blocked = self.cbo_section.blockSignals(True)
+        ed_blocked = self.ed_custom.blockSignals(True)
+        try:
+            if idx is None:
+                idx = self._preset_index["__custom__"]
                 self.ed_custom.setText(t)
-                self._on_section_changed()
-                return
+            else:
+                self.ed_custom.setText("")
+            self.cbo_section.setCurrentIndex(idx)
+        finally:
+            self.ed_custom.blockSignals(ed_blocked)
+            self.cbo_section.blockSignals(cbo_blocked)
+        self._on_section_changed()
+
+    def showEvent(self, event: QShowEvent) -> None:
+        super().showEvent(event)
+        if not self._preview_primed:
+            self._preview_primed = True
+            self._update_preview()
 
     # ---------------- UI ----------------
     def _build_ui(self) -> None:
@@ -154,6 +260,8 @@ class PdfTemplateDialog(QDialog):
         for val, label in self.SECTION_PRESETS:
             self.cbo_section.addItem(label, userData=val)
         self.cbo_section.setCurrentIndex(0)
+        # preset value -> combobox index
+        self._preset_index: Dict[str, int] = {val: i for i, (val, _) in enumerate(self.SECTION_PRESETS)}
         sec_row.addWidget(self.cbo_section, 0)
 
         self.ed_custom = QLineEdit()
@@ -184,6 +292,8 @@ class PdfTemplateDialog(QDialog):
             left.addWidget(rb)
 
         self.radios["classic"].setChecked(True)
+        # buttonClicked hands over the button itself; map it straight to its template id
+        self._btn_to_tid: Dict[QAbstractButton, str] = {rb: tid for tid, rb in self.radios.items()}
         left.addStretch(1)
         mid.addWidget(box, 0)
 
@@ -213,23 +323,31 @@ class PdfTemplateDialog(QDialog):
     def _wire(self) -> None:
         self.grp.buttonClicked.connect(self._on_template_changed)
         self.cbo_section.currentIndexChanged.connect(self._on_section_changed)
-        self.ed_custom.textChanged.connect(lambda _t: self._update_preview())
+        # typing a custom title or arrowing through the section combo re-renders once input settles
+        self._preview_timer = QTimer(self)
+        self._preview_timer.setSingleShot(True)
+        self._preview_timer.setInterval(_PREVIEW_DEBOUNCE_MS)
+        self._preview_timer.timeout.connect(self._update_preview)
+        self.ed_custom.textChanged.connect(lambda _t: self._preview_timer.start())
         self.btn_cancel.clicked.connect(self.reject)
         self.btn_ok.clicked.connect(self.accept)
 
-    def _on_template_changed(self) -> None:
-        for tid, rb in self.radios.items():
-            if rb.isChecked():
-                self._selected_template_id = tid
-                break
+    def _on_template_changed(self, btn: QAbstractButton) -> None:
+        tid = self._btn_to_tid.get(btn)
+        if tid is not None:
+            self._selected_template_id = tid
+        # a click is a single discrete event: paint now and drop any pending debounced paint
+        self._preview_timer.stop()
         self._update_preview()
 
     def _on_section_changed(self) -> None:
-        is_custom = (self.cbo_section.currentData() == "__custom__")
+        key = self.cbo_section.currentData() or ""
+        self._current_section_key = key
+        self._current_is_custom = is_custom = (key == "__custom__")
         self.ed_custom.setEnabled(is_custom)
         if not is_custom:
             self.ed_custom.setText("")
-        self._update_preview()
+        self._preview_timer.start()
 
     # -------- preview helpers --------
     def _qt_family_from_export_font(self, export_font: str) -> str:
@@ -239,160 +357,347 @@ class PdfTemplateDialog(QDialog):
         return "Segoe UI"
 
     def _walk_tree(self, nodes: List[Dict[str, Any]], level: int = 1) -> List[Tuple[int, str, str]]:
+        # pre-order DFS with an explicit stack of (level, sibling iterator) frames
         out: List[Tuple[int, str, str]] = []
-        for n in nodes or []:
-            out.append((level, (n.get("code") or "").strip(), (n.get("name") or "").strip()))
-            kids = n.get("children") or []
-            out.extend(self._walk_tree(kids, level + 1))
+        append = out.append
+        stack = [(level, iter(nodes or []))]
+        while stack:
+            lvl, it = stack[-1]
+            n = next(it, None)
+            if n is None:
+                stack.pop()
+                continue
+            append((lvl, (n.get("code") or "").strip(), (n.get("name") or "").strip()))
+            kids = n.get("children")
+            if kids:
+                stack.append((lvl + 1, iter(kids)))
         return out
 
     def _doc_rows(self) -> List[Tuple[int, str, str]]:
+        if self._rows is None:
+            self._rows = self._build_doc_rows()
+            self._rows_hash = hash(tuple(self._rows))
+        return self._rows
+
+    def _rows_fingerprint(self) -> int:
+        self._doc_rows()
+        return self._rows_hash
+
+    def _build_doc_rows(self) -> List[Tuple[int, str, str]]:
         if self._preview_doc and isinstance(getattr(self._preview_doc, "hierarchy", None), list):
             rows = self._walk_tree(self._preview_doc.hierarchy, 1)  # type: ignore[arg-type]
             if rows and rows[0][1] == "" and rows[0][2] == "":
                 return rows[1:]
             return rows
-        return [
-            (1, "01", "Mammals"),
-            (2, "01.1", "Mammals – Carnivora"),
-            (3, "01.1.1", "Katsoulia"),
-            (1, "02", "Birds"),
-            (2, "02.1", "Birds – Passerines"),
-            (3, "02.1.1", "Ornithes"),
-            (1, "03", "Reptiles"),
-            (2, "03.1", "Reptiles – Lizards"),
-            (3, "03.1.1", "Liakonia"),
-        ]
-
-    def _wrap_lines(self, fm: QFontMetrics, text: str, max_w: int) -> List[str]:
+        return list(_DEMO_ROWS)
+
+    def _char_widths(self, font_key: str) -> Dict[str, float]:
+        return self._char_w_cache.setdefault(font_key, {})
+
+    def _wrap_lines(self, fmf: QFontMetricsF, font_key: str, text: str, max_w: int) -> List[str]:
         t = (text or "").strip()
         if not t:
             return [""]
 
+        # same rows are re-wrapped on every preview refresh; the font key (QFont.key() of the
+        # font fmf measures) pins the metrics
+        key = (font_key, t, max_w)
+        hit = self._wrap_cache.get(key)
+        if hit is not None:
+            return list(hit)
+
+        # fit decisions always come from a real (fractional, kerned) measurement of the whole
+        # string: the lines are drawn unclipped, so an estimate that is too low would overflow
+        width = fmf.horizontalAdvance
+        # most names fit on one line: one measurement, no word list or line tuples
+        if width(t) <= max_w:
+            out = [t]
+            self._remember_wrap(key, out)
+            return out
+
         words = t.split()
-        lines: List[str] = []
-        cur: List[str] = []
+        word_w = {w: width(w) for w in set(words)}
+        space_w = width(" ")
 
-        def width(s: str) -> int:
-            return fm.horizontalAdvance(s)
+        lines: List[Tuple[str, float]] = []
+        cur = ""
+        cur_w = 0.0
 
         for w in words:
+            ww = word_w[w]
             if not cur:
-                cur = [w]
+                cur = w
+                cur_w = ww
                 continue
-            trial = " ".join(cur + [w])
-            if width(trial) <= max_w:
-                cur.append(w)
-            else:
-                lines.append(" ".join(cur))
-                cur = [w]
+            # summed widths only rule out clear misses; a candidate line is measured as a whole
+            if cur_w + space_w + ww <= max_w + 1.0:
+                trial = cur + " " + w
+                trial_w = width(trial)
+                if trial_w <= max_w:
+                    cur = trial
+                    cur_w = trial_w
+                    continue
+            lines.append((cur, cur_w))
+            cur = w
+            cur_w = ww
 
         if cur:
-            lines.append(" ".join(cur))
+            lines.append((cur, cur_w))
 
         fixed: List[str] = []
-        for line in lines:
-            if width(line) <= max_w:
+        for line, line_w in lines:
+            if line_w <= max_w:
                 fixed.append(line)
                 continue
-            buf = ""
-            for ch in line:
-                trial = buf + ch
-                if width(trial) <= max_w:
-                    buf = trial
-                else:
-                    if buf:
-                        fixed.append(buf)
-                    buf = ch
-            if buf:
-                fixed.append(buf)
-
-        return fixed if fixed else [""]
-
-    def _ellipsis_fit(self, fm: QFontMetrics, text: str, max_w: int) -> str:
+            # only a single word wider than the column gets here: break it by characters
+            fixed.extend(self._break_word(fmf, font_key, line, max_w))
+
+        out = fixed if fixed else [""]
+        self._remember_wrap(key, out)
+        return out
+
+    def _break_word(self, fmf: QFontMetricsF, font_key: str, word: str, max_w: int) -> List[str]:
+        # cut points are estimated from cached per-character advances, then confirmed by measuring
+        width = fmf.horizontalAdvance
+        char_w = self._char_widths(font_key)
+        out: List[str] = []
+        pos, n = 0, len(word)
+        while pos < n:
+            acc = 0.0
+            end = pos
+            while end < n:
+                ch = word[end]
+                cw = char_w.get(ch)
+                if cw is None:
+                    cw = char_w[ch] = width(ch)
+                if acc + cw > max_w and end > pos:
+                    break
+                acc += cw
+                end += 1
+            while end - pos > 1 and width(word[pos:end]) > max_w:
+                end -= 1
+            out.append(word[pos:end])
+            pos = end
+        return out
+
+    def _static_text(self, font_key: str, text: str) -> QStaticText:
+        """Row text laid out once and reused by every repaint that draws it in the same font."""
+        key = (font_key, text)
+        st = self._static_text_cache.get(key)
+        if st is None:
+            if len(self._static_text_cache) >= _STATIC_TEXT_CACHE_MAX:
+                self._static_text_cache.clear()
+            st = QStaticText(text)
+            st.setTextFormat(Qt.PlainText)
+            st.setPerformanceHint(QStaticText.AggressiveCaching)
+            self._static_text_cache[key] = st
+        return st
+
+    def _remember_wrap(self, key: Tuple[str, str, int], lines: List[str]) -> None:
+        if len(self._wrap_cache) >= _WRAP_CACHE_MAX:
+            self._wrap_cache.clear()
+        self._wrap_cache[key] = tuple(lines)
+
+    def _ellipsis_fit(self, fmf: QFontMetricsF, font_key: str, text: str, max_w: int) -> str:
         s = (text or "").strip()
-        if fm.horizontalAdvance(s) <= max_w:
+        width = fmf.horizontalAdvance
+        if width(s) <= max_w:
             return s
         ell = "…"
-        if fm.horizontalAdvance(ell) > max_w:
+        ell_w = width(ell)
+        if ell_w > max_w:
             return ""
-        lo, hi = 0, len(s)
-        best = ell
-        while lo <= hi:
-            mid = (lo + hi) // 2
-            cand = s[:mid].rstrip() + ell
-            if fm.horizontalAdvance(cand) <= max_w:
-                best = cand
-                lo = mid + 1
-            else:
-                hi = mid - 1
-        return best
+        # one left-to-right pass over per-character advances (repeated letters measured once)
+        # estimates the cut; the result is then measured and shortened until it really fits
+        char_w = self._char_widths(font_key)
+        acc = ell_w
+        cut = 0
+        for i, ch in enumerate(s):
+            cw = char_w.get(ch)
+            if cw is None:
+                cw = char_w[ch] = width(ch)
+            acc += cw
+            if acc > max_w:
+                break
+            cut = i + 1
+        while cut > 0 and width(s[:cut].rstrip() + ell) > max_w:
+            cut -= 1
+        return s[:cut].rstrip() + ell
 
     # ---------------- Preview rendering ----------------
-    def _update_preview(self) -> None:
-        pm = QPixmap(600, 740)
-        pm.fill(Qt.black)
-
-        p = QPainter(pm)
+    def _paper_background(self, tid: str, dpr: float, fonts: Dict[str, Any]) -> QImage:
+        """Black canvas, paper sheet and any fixed header text; depends only on template and size."""
+        # 600x740 logical layout, backed by device pixels so HiDPI screens get a crisp
+        # picture without Qt rescaling the pixmap on every paint. Painted as a plain CPU
+        # image in the raster engine's native format; only the finished frame becomes a QPixmap.
+        w, h = int(round(600 * dpr)), int(round(740 * dpr))
+        key = (tid, w, h)
+        bg = self._paper_bg_cache.get(key)
+        if bg is not None:
+            return bg
+
+        bg = QImage(w, h, QImage.Format_ARGB32_Premultiplied)
+        bg.setDevicePixelRatio(dpr)
+        bg.fill(Qt.black)
+
+        p = QPainter(bg)
         p.setRenderHint(QPainter.Antialiasing, True)
 
         # paper
-        paper_x, paper_y = 80, 45
-        paper_w, paper_h = 440, 650
         p.setPen(QPen(Qt.white, 2))
         p.setBrush(Qt.white)
-        p.drawRoundedRect(paper_x, paper_y, paper_w, paper_h, 10, 10)
+        p.drawRoundedRect(_PAPER_X, _PAPER_Y, _PAPER_W, _PAPER_H, 10, 10)
 
-        tid = norm_template_id(self._selected_template_id)
-        spec = merged_template_defaults(tid)
+        if tid == "institutional":
+            left = _PAPER_X + 22
+            right = _PAPER_X + _PAPER_W - 22
+            p.setFont(fonts["small"])
+            p.setPen(Qt.black)
+            p.drawText(QRect(left, _PAPER_Y + 16, right - left, 14), int(Qt.AlignLeft | Qt.AlignTop),
+                       "NHMC — Natural History Museum of Crete")
+        p.end()
+
+        self._paper_bg_cache[key] = bg
+        return bg
+
+    def _header_background(self, tid: str, dpr: float, fonts: Dict[str, Any]) -> QImage:
+        """Paper background plus the centered title and cabinet lines; section edits don't touch it."""
+        bg = self._paper_background(tid, dpr, fonts)
+        key = (tid, self._title, self._cabinet, bg.width(), bg.height())
+        hdr = self._header_cache.get(key)
+        if hdr is not None:
+            return hdr
+
+        hdr = QImage(bg)
+        p = QPainter(hdr)
+        p.setPen(Qt.black)
+        y = _PAPER_Y + 20
+        if tid == "institutional":
+            y += 10
+        flags = int(Qt.AlignHCenter | Qt.AlignTop)
+        # main title centered
+        p.setFont(fonts["title"])
+        p.drawText(QRect(_PAPER_X, y, _PAPER_W, 28), flags, self._title[:72])
+        # cabinet centered
+        p.setFont(fonts["sub"])
+        p.drawText(QRect(_PAPER_X, y + 26, _PAPER_W, 20), flags, self._cabinet[:90])
+        p.end()
+
+        self._header_cache.put(key, hdr)
+        return hdr
+
+    def _template_spec(self, template_id: str) -> Tuple[str, Dict[str, Any]]:
+        """Normalized id and merged defaults, resolved once per selected id instead of per paint."""
+        hit = self._spec_cache.get(template_id)
+        if hit is None:
+            tid = norm_template_id(template_id)
+            hit = self._spec_cache[template_id] = (tid, merged_template_defaults(tid))
+        return hit
+
+    def _template_fonts(self, tid: str, spec: Dict[str, Any]) -> Dict[str, Any]:
+        """Fonts, body metrics and row spacing for a template; they depend only on its spec."""
+        hit = self._font_cache.get(tid)
+        if hit is not None:
+            return hit
+
+        fam = self._qt_family_from_export_font(spec.get("font_regular", "Helvetica"))
+        base_size = int(round(float(spec.get("max_font", 11.0))))
+        leading_mult = float(spec.get("leading_mult", 1.25))
+        body_font = _qfont(fam, base_size)
+        fm = QFontMetrics(body_font)
+
+        fonts = {
+            "title": _qfont(fam, int(round(float(spec.get("header_title_size", 14.0)))), bold=True),
+            "sub": _qfont(fam, int(round(float(spec.get("header_sub_size", 10.0))))),
+            "section": _qfont(fam, int(round(float(spec.get("header_section_size", 11.0)))), bold=True),
+            "small": _qfont(fam, 8),
+            "body": body_font,
+            "body_b": _qfont(fam, base_size, bold=True),
+            # fractional, kerned advances for wrap / ellipsis fit decisions
+            "fmf": QFontMetricsF(body_font),
+            # QFontMetrics doesn't expose its font; measurement caches key on this instead
+            "body_key": body_font.key(),
+            "lead_px": max(12, int(round(fm.height() * (leading_mult / 1.25)))),  # stable-ish
+            "pad_px": max(2, int(round(float(spec.get("row_pad_pt", 4.0))))),
+        }
+        self._font_cache[tid] = fonts
+        return fonts
+
+    def _update_preview(self) -> None:
+        if not self._preview_primed:
+            return
+        tid, spec = self._template_spec(self._selected_template_id)
         section_title = self.selected_section_title()
+        dpr = self.preview.devicePixelRatioF()
+        key = (tid, section_title, self._title, self._cabinet, self._rows_fingerprint(), dpr)
+        if key == self._last_render_key:
+            return
+        self._last_render_key = key
+
+        cached = self._preview_cache.get(key)
+        if cached is not None:
+            self.preview.setPixmap(cached)
+            return
+
+        tc = _template_consts(tid, spec)
         rows = self._doc_rows()
 
-        fam = self._qt_family_from_export_font(spec.get("font_regular", "Helvetica"))
+        fonts = self._template_fonts(tid, spec)
 
-        title_font = QFont(fam, int(round(float(spec.get("header_title_size", 14.0)))), QFont.Bold)
-        sub_font = QFont(fam, int(round(float(spec.get("header_sub_size", 10.0)))))
-        section_font = QFont(fam, int(round(float(spec.get("header_section_size", 11.0)))), QFont.Bold)
+        # start from the cached background with the title block; painting detaches this copy
+        img = QImage(self._header_background(tid, dpr, fonts))
 
-        base_size = float(spec.get("max_font", 11.0))
-        leading_mult = float(spec.get("leading_mult", 1.25))
-        body_font = QFont(fam, int(round(base_size)))
-        body_b = QFont(fam, int(round(base_size)), QFont.Bold)
+        # only text and axis-aligned rules are drawn here: text keeps its own
+        # TextAntialiasing hint, and the rules are pixel-exact without the AA path
+        p = QPainter(img)
+
+        paper_x, paper_y = _PAPER_X, _PAPER_Y
+        paper_w, paper_h = _PAPER_W, _PAPER_H
+        section_font = fonts["section"]
+        body_font = fonts["body"]
+        body_b = fonts["body_b"]
 
         left = paper_x + 22
         right = paper_x + paper_w - 22
         y = paper_y + 20
 
+        # painter state changes only on transitions: text pen set once, fonts tracked by identity
+        p.setPen(Qt.black)
+        last_font: List[Optional[QFont]] = [None]
+
+        def use_font(font: QFont) -> None:
+            if font is not last_font[0]:
+                p.setFont(font)
+                last_font[0] = font
+
         def draw_text_rect(font: QFont, x: int, y_top: int, w: int, h: int, text: str, flags: Qt.AlignmentFlag) -> None:
-            p.setFont(font)
-            p.setPen(Qt.black)
+            use_font(font)
             p.drawText(QRect(x, y_top, w, h), int(flags), text)
 
-        # institutional small header line
+        # institutional header line, title and cabinet are already in the header background
         if tid == "institutional":
-            draw_text_rect(QFont(fam, 8), left, y - 4, right - left, 14, "NHMC — Natural History Museum of Crete", Qt.AlignLeft | Qt.AlignTop)
             y += 10
-
-        # main title centered
-        draw_text_rect(title_font, paper_x, y, paper_w, 28, (self._title or "").strip()[:72], Qt.AlignHCenter | Qt.AlignTop)
-        y += 26
-
-        # cabinet centered
-        draw_text_rect(sub_font, paper_x, y, paper_w, 20, (self._cabinet or "").strip()[:90], Qt.AlignHCenter | Qt.AlignTop)
-        y += 18
+        y += 26 + 18
 
         # section title
         if section_title:
             draw_text_rect(section_font, left, y, right - left, 18, section_title, Qt.AlignLeft | Qt.AlignTop)
             y += 18
 
-        # header rule
-        p.setPen(QPen(Qt.black, max(1, int(round(float(spec.get("header_rule_width", 1.0)))))))
-        p.drawLine(left, y + 6, right, y + 6)
-        y += int(round(float(spec.get("header_gap_pt", 12.0))))
+        # 1px rules are collected and submitted in one drawLines call after the rows
+        rules: List[QLine] = []
+
+        # header rule (the text pen is already 1px black)
+        if tc.header_rule_width != 1:
+            p.setPen(QPen(Qt.black, tc.header_rule_width))
+            p.drawLine(left, y + 6, right, y + 6)
+            p.setPen(Qt.black)
+        else:
+            rules.append(QLine(left, y + 6, right, y + 6))
+        y += tc.header_gap
 
         # two-column heuristic for preview only
-        allow_two_cols = (tid == "two_column") or (len(rows) >= 18 and tid in ("outline", "modern", "compact"))
+        allow_two_cols = tc.two_cols_always or (len(rows) >= 18 and tc.two_cols_when_long)
         col_gap = 14
         col_w = ((right - left) - col_gap) // 2 if allow_two_cols else (right - left)
 
@@ -401,74 +706,106 @@ class PdfTemplateDialog(QDialog):
         col_idx = 0
 
         # column widths by template
-        if tid == "code_first":
-            code_col_w = int(col_w * 0.40)
-        else:
-            code_col_w = int(col_w * 0.30)
-        if tid in ("outline", "two_column"):
-            code_col_w = int(col_w * 0.26)
-
-        code_name_gap = int(round(float(spec.get("code_name_gap_pt", 10.0))))
+        code_col_w = int(col_w * tc.code_col_ratio)
+        code_name_gap = tc.code_name_gap
         name_col_w = max(80, col_w - code_col_w - code_name_gap)
 
-        row_rules = bool(spec.get("row_rules", False))
-        row_rule_every = max(1, int(spec.get("row_rule_every", 1)))
+        outline = tc.outline
+        max_lines = tc.max_name_lines
+        row_rules = tc.row_rules
+        row_rule_every = tc.row_rule_every
 
-        fm = QFontMetrics(body_font)
-        lead_px = max(12, int(round(fm.height() * (leading_mult / 1.25))))  # stable-ish
-        pad_px = max(2, int(round(float(spec.get("row_pad_pt", 4.0)))))
+        fmf = fonts["fmf"]
+        body_key = fonts["body_key"]
+        lead_px = fonts["lead_px"]
+        pad_px = fonts["pad_px"]
 
-        def next_col_or_stop() -> None:
+        def next_col() -> bool:
+            """Move to the second column if there is one; False means the page is full."""
             nonlocal col_idx, x_left, y
             if allow_two_cols and col_idx == 0:
                 col_idx = 1
                 x_left = left + col_w + col_gap
                 y = y_start
-                return
-            y = paper_y + paper_h - 20  # stop drawing
+                return True
+            return False
+
+        # layout pass only records positions; text is drawn afterwards grouped by font,
+        # so the painter switches fonts twice instead of twice per row
+        codes: List[Tuple[int, int, str]] = []
+        bullets: List[Tuple[int, int]] = []
+        names: List[Tuple[int, int, List[str]]] = []
+
+        # loop invariants: bound helpers, the page bottom, the bullet gap and per-level indents
+        wrap_lines = self._wrap_lines
+        ellipsis_fit = self._ellipsis_fit
+        page_bottom = paper_y + paper_h - 24
+        bullet_gap = int(round(BULLET_GAP_PT))
+        indents: Dict[int, int] = {}
 
         # draw rows (top-aligned rectangles, no baseline bugs)
         for idx, (lvl, code, name) in enumerate(rows, start=1):
-            lvl_i = int(lvl or 1)
-            indent = int(round((max(lvl_i - 1, 0) * INDENT_STEP_PT))) if tid in ("outline", "two_column") else 0
+            if outline:
+                lvl_i = int(lvl or 1)
+                indent = indents.get(lvl_i)
+                if indent is None:
+                    indent = indents[lvl_i] = int(round((max(lvl_i - 1, 0) * INDENT_STEP_PT)))
+            else:
+                indent = 0
 
             # wrap name
             avail_name_w = max(60, name_col_w - indent)
-            lines = self._wrap_lines(fm, name, avail_name_w)
-            max_lines = int(spec.get("max_name_lines", 3) or 3)
+            lines = wrap_lines(fmf, body_key, name, avail_name_w)
             if len(lines) > max_lines:
                 lines = lines[:max_lines]
-                lines[-1] = self._ellipsis_fit(fm, lines[-1], avail_name_w)
+                lines[-1] = ellipsis_fit(fmf, body_key, lines[-1], avail_name_w)
 
             row_h = (len(lines) * lead_px) + pad_px
 
-            if y + row_h > (paper_y + paper_h - 24):
-                next_col_or_stop()
+            if y + row_h > page_bottom and not next_col():
+                # page full: the remaining rows would not be visible, so skip their layout too
+                break
 
             x = x_left + indent
 
             # bullet
-            if tid in ("outline", "two_column"):
-                draw_text_rect(body_font, x, y, 14, lead_px, "•", Qt.AlignLeft | Qt.AlignTop)
-                x += int(round(BULLET_GAP_PT))
-
-            # code
-            draw_text_rect(body_b, x, y, code_col_w, lead_px, str(code), Qt.AlignLeft | Qt.AlignTop)
+            if outline:
+                bullets.append((x, y))
+                x += bullet_gap
 
-            # name lines
-            name_x = x + code_col_w + code_name_gap
-            yy = y
-            for line in lines:
-                draw_text_rect(body_font, name_x, yy, avail_name_w, lead_px, line, Qt.AlignLeft | Qt.AlignTop)
-                yy += lead_px
+            codes.append((x, y, code))
+            names.append((x + code_col_w + code_name_gap, y, lines))
 
             y += row_h
 
             # row rules BELOW the row (never through text)
             if row_rules and (idx % row_rule_every == 0):
-                p.setPen(QPen(Qt.black, 1))
-                p.drawLine(x_left, y - 2, x_left + col_w, y - 2)
-                p.setPen(Qt.black)
+                rules.append(QLine(x_left, y - 2, x_left + col_w, y - 2))
+
+        if rules:
+            p.drawLines(rules)
+
+        # codes
+        code_flags = int(Qt.AlignLeft | Qt.AlignTop)
+        use_font(body_b)
+        for cx, cy, code in codes:
+            p.drawText(QRect(cx, cy, code_col_w, lead_px), code_flags, code)
+
+        # bullets and name lines: already wrapped to avail_name_w, so each line is a
+        # pre-laid QStaticText drawn at its top-left corner (no reshaping on repaint)
+        use_font(body_font)
+        static_text = self._static_text
+        draw_static = p.drawStaticText
+        if bullets:
+            bullet = static_text(body_key, "•")
+            for bx, by in bullets:
+                draw_static(bx, by, bullet)
+        for nx, ny, lines in names:
+            for line in lines:
+                draw_static(nx, ny, static_text(body_key, line))
+                ny += lead_px
 
         p.end()
+        pm = QPixmap.fromImage(img)
+        self._preview_cache.put(key, pm)
         self.preview.setPixmap(pm)
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# widgets are painted without a display
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    QtWidgets = pytest.importorskip("PySide6.QtWidgets")
+    from PySide6.QtCore import QCoreApplication, QEvent
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    yield app
+    # destroy widgets released with deleteLater() while the application still exists
+    QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
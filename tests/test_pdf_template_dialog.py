@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import pytest
+
+pytest.importorskip("PySide6")
+# the dialog's template specs module is not part of every checkout
+pytest.importorskip("src.services.export.pdf.template_specs")
+
+from PySide6.QtGui import QFontMetricsF  # noqa: E402
+
+from src.domain.models import LabelDocument  # noqa: E402
+from src.ui.qt.widgets.pdf_template_dialog import TEMPLATES, PdfTemplateDialog  # noqa: E402
+
+
+LONG_NAME = "Mammals – Carnivora – Felidae – Felis silvestris cretensis (Cretan wildcat) AVAWAVATAYA"
+
+
+def _doc() -> LabelDocument:
+    doc = LabelDocument()
+    doc.title = "NHMC Label"
+    doc.cabinet_section = "Cabinet Section: Example Cabinet A"
+    doc.hierarchy = [  # type: ignore[attr-defined]
+        {
+            "code": "01",
+            "name": "Mammals",
+            "children": [
+                {"code": "01.1", "name": LONG_NAME, "children": [{"code": "01.1.1", "name": "Κατσούλια"}]},
+            ],
+        },
+        {"code": "02", "name": "Supercalifragilisticexpialidociousbirdsandmorebirds"},
+    ]
+    return doc
+
+
+@pytest.mark.parametrize("template_id", [t.template_id for t in TEMPLATES])
+def test_preview_paints_on_show(qapp, template_id):
+    dlg = PdfTemplateDialog()
+    dlg.set_preview_document(_doc())
+    dlg.radios[template_id].setChecked(True)
+    dlg._selected_template_id = template_id
+    dlg.show()
+    qapp.processEvents()
+    try:
+        pm = dlg.preview.pixmap()
+        assert not pm.isNull()
+        dpr = pm.devicePixelRatio()
+        assert (round(pm.width() / dpr), round(pm.height() / dpr)) == (600, 740)
+    finally:
+        dlg.close()
+        dlg.deleteLater()
+
+
+@pytest.mark.parametrize("max_w", [40, 73, 120, 199, 260])
+def test_wrapped_and_ellipsized_names_fit_their_column(qapp, max_w):
+    dlg = PdfTemplateDialog()
+    fonts = dlg._template_fonts("classic", {"font_regular": "Helvetica", "max_font": 11.0})
+    fmf: QFontMetricsF = fonts["fmf"]
+    key = fonts["body_key"]
+
+    for name in (LONG_NAME, "Κατσούλια της Κρήτης", "Supercalifragilisticexpialidocious"):
+        lines = dlg._wrap_lines(fmf, key, name, max_w)
+        assert "".join(lines).replace(" ", "") == name.replace(" ", "")
+        for line in lines:
+            assert len(line) == 1 or fmf.horizontalAdvance(line) <= max_w
+
+        fitted = dlg._ellipsis_fit(fmf, key, name, max_w)
+        assert fmf.horizontalAdvance(fitted) <= max_w
+    dlg.deleteLater()